@@ -0,0 +1,58 @@
+# SPDX-License-Identifier: MIT
+
+"""Throughput and event-loop lag of AsyncManager under concurrent renders.
+
+Usage: python benchmarks/bench_async.py
+"""
+
+import asyncio
+import time
+
+from manager import AsyncManager, Manager
+
+CONCURRENCY = [1, 8, 64]
+HISTORY = 500
+RENDERS = 200
+
+
+async def _measure(am, messages, concurrency):
+    lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal lag
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lag = max(lag, time.perf_counter() - start - 0.001)
+
+    async def worker(count):
+        for _ in range(count):
+            await am.render_chat_completions("grok-4", messages, temperature=0.7)
+
+    tick = asyncio.ensure_future(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*[worker(RENDERS // concurrency) for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    done = True
+    await tick
+    return (RENDERS // concurrency) * concurrency / elapsed, lag * 1e3
+
+
+def main() -> None:
+    messages = [
+        {"role": "user", "content": f"Message number {i} " * 8} for i in range(HISTORY)
+    ]
+    modes = {
+        "inline": AsyncManager(Manager(), offload_threshold=HISTORY + 1),
+        "offload": AsyncManager(Manager(), max_concurrency=4, offload_threshold=64),
+    }
+    print(f"{'mode':>8} {'concurrency':>12} {'renders/s':>10} {'max lag ms':>11}")
+    for name, am in modes.items():
+        for concurrency in CONCURRENCY:
+            rate, lag = asyncio.run(_measure(am, messages, concurrency))
+            print(f"{name:>8} {concurrency:>12} {rate:>10.0f} {lag:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
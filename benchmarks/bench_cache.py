@@ -0,0 +1,68 @@
+# SPDX-License-Identifier: MIT
+
+"""Render cache hits vs uncached renders.
+
+Times an uncached render against a cache hit for the same request, with
+the messages either the same objects as the cached request (a retry) or an
+equal copy decoded from JSON (a duplicate request from another client,
+whose strings have not been hashed yet). Reports the time per request and
+the hit time as a ratio of the render time; hits should stay well below 1.
+
+Usage: python benchmarks/bench_cache.py
+"""
+
+import json
+import time
+
+from manager import Manager, RenderCache
+
+MESSAGE_COUNTS = [1, 10, 100, 1000]
+ENGINES = ["jinja", "native"]
+ROUNDS = 20
+
+
+def _messages(count):
+    roles = ["user", "assistant"]
+    return [
+        {"role": roles[i % 2], "content": f"Message number {i} " * 32}
+        for i in range(count)
+    ]
+
+
+def _measure(m, requests):
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for messages in requests:
+            m.render_chat_completions("grok-4", messages, temperature=0.7)
+        best = min(best, time.perf_counter() - start)
+    return best / len(requests)
+
+
+def main() -> None:
+    print(
+        f"{'messages':>9} {'engine':>7} {'render us':>10} {'hit us':>9} "
+        f"{'decoded us':>11} {'hit/render':>11}"
+    )
+    for count in MESSAGE_COUNTS:
+        messages = _messages(count)
+        encoded = json.dumps(messages)
+        for engine in ENGINES:
+            m = Manager(engine=engine)
+            cached = Manager(engine=engine, render_cache=RenderCache())
+            cached.render_chat_completions("grok-4", messages, temperature=0.7)
+            render = _measure(m, [messages] * ROUNDS)
+            hit = _measure(cached, [messages] * ROUNDS)
+            # Fresh copies per round, so every lookup hashes new strings.
+            decoded = min(
+                _measure(cached, [json.loads(encoded) for _ in range(ROUNDS)])
+                for _ in range(3)
+            )
+            print(
+                f"{count:>9} {engine:>7} {render * 1e6:>10.1f} {hit * 1e6:>9.1f} "
+                f"{decoded * 1e6:>11.1f} {decoded / render:>11.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# SPDX-License-Identifier: MIT
+
+"""Streamed compression vs rendering the payload and compressing it after.
+
+Compares time and peak traced memory of ``render_chat_completions_bytes``
+followed by a one-shot ``gzip.compress`` against ``compress="gzip"``, which
+compresses each chunk as it is encoded. Peak memory is reported as a ratio
+of the uncompressed payload size; streamed compression should stay well
+below 1.
+
+Usage: python benchmarks/bench_compress.py
+"""
+
+import gzip
+import time
+import tracemalloc
+from functools import partial
+
+from manager import Manager
+from manager._stream import GZIP_LEVEL
+
+MESSAGE_COUNTS = [100, 1000, 10000]
+REPEAT = 5
+
+
+def _messages(count):
+    roles = ["user", "assistant"]
+    return [
+        {"role": roles[i % 2], "content": f"Message number {i} " * 32}
+        for i in range(count)
+    ]
+
+
+def _after(m, messages):
+    data = m.render_chat_completions_bytes("grok-4", messages)
+    return gzip.compress(data, GZIP_LEVEL, mtime=0)
+
+
+def _streamed(m, messages):
+    return m.render_chat_completions_bytes("grok-4", messages, compress="gzip")
+
+
+def _measure(func):
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    data = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, len(data)
+
+
+def main() -> None:
+    m = Manager(engine="native")
+    print(
+        f"{'messages':>9} {'mode':>9} {'ms':>9} {'peak MiB':>9} "
+        f"{'peak/size':>10} {'KiB out':>9}"
+    )
+    for count in MESSAGE_COUNTS:
+        messages = _messages(count)
+        payload = len(m.render_chat_completions_bytes("grok-4", messages))
+        for name, func in (("after", _after), ("streamed", _streamed)):
+            best, peak, size = _measure(partial(func, m, messages))
+            print(
+                f"{count:>9} {name:>9} {best * 1e3:>9.2f} {peak / 2**20:>9.2f} "
+                f"{peak / payload:>10.2f} {size / 1024:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# SPDX-License-Identifier: MIT
+
+"""Compare the Jinja2 and native render engines across message counts.
+
+Usage: python benchmarks/bench_engines.py
+"""
+
+import timeit
+from functools import partial
+
+from manager import Manager
+
+MESSAGE_COUNTS = [1, 10, 100, 1000]
+TOOLS = [
+    {"type": "function", "function": {"name": f"tool_{i}", "description": "A tool"}}
+    for i in range(10)
+]
+
+KWARGS = {"temperature": 0.7, "stream": True}
+
+
+def _messages(count):
+    roles = ["user", "assistant"]
+    return [
+        {"role": roles[i % 2], "content": f"Message number {i} " * 8}
+        for i in range(count)
+    ]
+
+
+def _best(func, number):
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+
+def main() -> None:
+    managers = {"jinja": Manager(), "native": Manager(engine="native")}
+    print(
+        f"{'messages':>8} {'endpoint':>16} {'jinja us':>10} {'native us':>10} {'speedup':>8}"
+    )
+    for count in MESSAGE_COUNTS:
+        messages = _messages(count)
+        number = max(10, 10000 // count)
+        for endpoint in ["chat_completions", "responses"]:
+            timings = {}
+            for engine, m in managers.items():
+                if endpoint == "responses":
+                    func = partial(m.render_responses, messages, TOOLS, **KWARGS)
+                else:
+                    func = partial(
+                        m.render_chat_completions, "grok-4", messages, TOOLS, **KWARGS
+                    )
+                timings[engine] = _best(func, number) * 1e6
+            print(
+                f"{count:>8} {endpoint:>16} {timings['jinja']:>10.1f} "
+                f"{timings['native']:>10.1f} {timings['jinja'] / timings['native']:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# SPDX-License-Identifier: MIT
+
+"""N individual renders vs one render_chat_completions_variants() call.
+
+Usage: python benchmarks/bench_fanout.py
+"""
+
+import timeit
+
+from manager import Manager
+
+VARIANTS = [1, 4, 16, 64]
+HISTORIES = [10, 100, 1000]
+TOOLS = [
+    {"type": "function", "function": {"name": f"tool_{i}", "description": "x" * 200}}
+    for i in range(8)
+]
+
+
+def _time(fn):
+    number, _ = timeit.Timer(fn).autorange()
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e3
+
+
+def main() -> None:
+    print(
+        f"{'engine':>7} {'messages':>9} {'N':>4} "
+        f"{'individual ms':>14} {'variants ms':>12} {'speedup':>8}"
+    )
+    for engine in ("jinja", "native"):
+        m = Manager(engine=engine)
+        for history in HISTORIES:
+            messages = [
+                {"role": "user", "content": f"Message number {i} " * 8}
+                for i in range(history)
+            ]
+            for n in VARIANTS:
+                variants = [
+                    {"model": f"model-{i % 2}", "temperature": i / n} for i in range(n)
+                ]
+
+                def individual(m=m, messages=messages, variants=variants):
+                    for variant in variants:
+                        m.render_chat_completions(
+                            messages=messages, tools=TOOLS, **variant
+                        )
+
+                def shared(m=m, messages=messages, variants=variants):
+                    m.render_chat_completions_variants(messages, variants, TOOLS)
+
+                before, after = _time(individual), _time(shared)
+                print(
+                    f"{engine:>7} {history:>9} {n:>4} "
+                    f"{before:>14.3f} {after:>12.3f} {before / after:>7.1f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
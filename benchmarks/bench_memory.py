@@ -0,0 +1,58 @@
+# SPDX-License-Identifier: MIT
+
+"""Memory and render time of dict vs Message conversations of 100k messages.
+
+Messages are decoded from JSON, as an agent loading a stored history would,
+so dict roles are separate string objects rather than shared literals.
+
+Usage: python benchmarks/bench_memory.py
+"""
+
+import json
+import time
+import tracemalloc
+
+from manager import Manager, Message
+
+HISTORY = 100_000
+
+
+def _history_json():
+    roles = ("system", "user", "assistant")
+    return json.dumps(
+        [
+            {"role": roles[i % 3], "content": f"Message number {i} " * 4}
+            for i in range(HISTORY)
+        ]
+    )
+
+
+def _measure(build):
+    tracemalloc.start()
+    messages = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return messages, size
+
+
+def main() -> None:
+    encoded = _history_json()
+    m = Manager(engine="native")
+    builds = {
+        "dict": lambda: json.loads(encoded),
+        "Message": lambda: [Message.from_dict(d) for d in json.loads(encoded)],
+    }
+    print(f"{'messages':>9} {'MiB':>8} {'bytes/msg':>10} {'render ms':>10}")
+    for name, build in builds.items():
+        messages, size = _measure(build)
+        start = time.perf_counter()
+        m.render_chat_completions("grok-4", messages)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:>9} {size / 2**20:>8.1f} {size / HISTORY:>10.0f} "
+            f"{elapsed * 1e3:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# SPDX-License-Identifier: MIT
+
+"""Import cost of the package and wall time of one-shot manager-cli runs.
+
+Usage: python benchmarks/bench_startup.py
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RUNS = 10
+CLI = [sys.executable, "-m", "manager.cli", "--message", "hi", "--temperature", "0.5"]
+FIRST_RENDER = (
+    "import os; from manager import Manager; "
+    "m = Manager(compiled_templates_dir=os.environ.get('MANAGER_TEMPLATE_CACHE')); "
+    "m.render_chat_completions('grok-4', [{'role': 'user', 'content': 'hi'}])"
+)
+
+
+def import_times(module):
+    """Return {module: cumulative microseconds} from ``python -X importtime``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def wall_time(command, env=None):
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, check=True, env=env)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e3
+
+
+def main() -> None:
+    print(f"{'import':>16} {'ms':>8}")
+    for module in ("manager", "manager.cli", "jinja2"):
+        print(f"{module:>16} {import_times(module)[module] / 1e3:>8.1f}")
+
+    baseline = wall_time([sys.executable, "-c", "pass"])
+    print(f"\n{'process':>28} {'median ms':>10}")
+    print(f"{'interpreter only':>28} {baseline:>10.1f}")
+    print(f"{'manager-cli':>28} {wall_time(CLI):>10.1f}")
+    jinja = [sys.executable, "-c", FIRST_RENDER]
+    print(f"{'jinja first render':>28} {wall_time(jinja):>10.1f}")
+    with tempfile.TemporaryDirectory() as cache:
+        env = dict(os.environ, MANAGER_TEMPLATE_CACHE=cache)
+        print(f"{'jinja first render, compiled':>28} {wall_time(jinja, env):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# SPDX-License-Identifier: MIT
+
+"""Batch rendering with and without a ContentStore.
+
+Every request shares one large system prompt and tool list and adds its own
+short user message, as a batch job over a dataset would. Requests are built
+from shared objects, or decoded from JSON per request (so the shared strings
+are equal but separate objects). Reports the time per payload and the peak
+memory allocated while rendering one.
+
+Usage: python benchmarks/bench_store.py
+"""
+
+import json
+import time
+import tracemalloc
+
+from manager import ContentStore, Manager
+
+REQUESTS = 2000
+PROMPT_SIZES = [4096, 65536]
+TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": f"tool_{i}",
+            "description": "Looks things up & returns <results>",
+            "parameters": {"type": "object", "properties": {"q": {"type": "string"}}},
+        },
+    }
+    for i in range(20)
+]
+
+
+def _requests(prompt_size, decoded):
+    prompt = ("You're a careful assistant. Answer <only> from context. " * 2048)[
+        :prompt_size
+    ]
+    system = {"role": "system", "content": prompt}
+    requests = [
+        {
+            "model": "grok-4",
+            "messages": [system, {"role": "user", "content": f"Question {i}?"}],
+            "tools": TOOLS,
+        }
+        for i in range(REQUESTS)
+    ]
+    if decoded:
+        requests = [json.loads(json.dumps(r)) for r in requests]
+    return requests
+
+
+def _measure(m, requests):
+    for request in requests[:10]:
+        m.render_chat_completions(**request)
+    start = time.perf_counter()
+    for request in requests:
+        m.render_chat_completions(**request)
+    elapsed = (time.perf_counter() - start) / len(requests)
+    tracemalloc.start()
+    m.render_chat_completions(**requests[-1])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main() -> None:
+    print(
+        f"{'prompt':>7} {'inputs':>8} {'store':>6} {'us/payload':>11} {'peak KiB':>9}"
+    )
+    for size in PROMPT_SIZES:
+        for decoded in (False, True):
+            requests = _requests(size, decoded)
+            for store in (None, ContentStore()):
+                m = Manager(engine="native", content_store=store)
+                elapsed, peak = _measure(m, requests)
+                print(
+                    f"{size:>7} {'decoded' if decoded else 'shared':>8} "
+                    f"{'yes' if store else 'no':>6} {elapsed * 1e6:>11.1f} "
+                    f"{peak / 1024:>9.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# SPDX-License-Identifier: MIT
+
+"""Per-message validation cost of the compiled validators versus the
+original hand-written loop.
+
+Usage: python benchmarks/bench_validation.py
+"""
+
+import timeit
+
+from manager._validation import validate_messages, validate_tools
+
+MESSAGE_COUNTS = [10, 100, 1000, 10000]
+TOOLS = [
+    {"type": "function", "function": {"name": f"tool_{i}", "description": "A tool"}}
+    for i in range(50)
+]
+
+
+def validate_messages_before(messages):
+    if not isinstance(messages, list):
+        raise ValueError("Messages must be a list")
+    for msg in messages:
+        if not isinstance(msg, dict):
+            raise ValueError("Each message must be a dict")
+        if "role" not in msg or "content" not in msg:
+            raise ValueError("Each message must have 'role' and 'content' keys")
+        if not isinstance(msg["role"], str) or not isinstance(msg["content"], str):
+            raise ValueError("'role' and 'content' must be strings")
+
+
+def validate_tools_before(tools):
+    if not isinstance(tools, list):
+        raise ValueError("Tools must be a list")
+    for tool in tools:
+        if not isinstance(tool, dict):
+            raise ValueError("Each tool must be a dict")
+        if "type" not in tool:
+            raise ValueError("Each tool must have 'type' key")
+        if tool["type"] == "function":
+            if "function" not in tool:
+                raise ValueError("Function tools must have 'function' key")
+            func = tool["function"]
+            if "name" not in func:
+                raise ValueError("Function must have 'name' key")
+        else:
+            raise ValueError(f"Unsupported tool type: {tool['type']}.")
+
+
+def _per_item_ns(func, items):
+    number = max(10, 100000 // len(items))
+    best = min(timeit.repeat(lambda: func(items), number=number, repeat=5))
+    return best / number / len(items) * 1e9
+
+
+def main() -> None:
+    print(f"{'messages':>8} {'before ns/msg':>14} {'after ns/msg':>13} {'speedup':>8}")
+    for count in MESSAGE_COUNTS:
+        roles = ["user", "assistant"]
+        messages = [{"role": roles[i % 2], "content": "x"} for i in range(count)]
+        before = _per_item_ns(validate_messages_before, messages)
+        after = _per_item_ns(validate_messages, messages)
+        print(f"{count:>8} {before:>14.1f} {after:>13.1f} {before / after:>7.2f}x")
+    before = _per_item_ns(validate_tools_before, TOOLS)
+    after = _per_item_ns(validate_tools, TOOLS)
+    print(f"{'tools':>8} {before:>14.1f} {after:>13.1f} {before / after:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+# SPDX-License-Identifier: MIT
+
+"""Benchmark suite for the rendering hot path with regression tracking.
+
+Times the render methods, validation alone and manager-cli end to end over
+a grid of message counts, content sizes and tool counts, and writes the
+results to JSON. With ``--compare``, each case is checked against a stored
+baseline from the same machine and the run fails if any case got slower
+than the threshold allows.
+
+Usage:
+    python benchmarks/suite.py [--output PATH] [--compare BASELINE]
+                               [--threshold 0.15] [--filter TEXT]
+
+``make bench`` writes benchmarks/results.json, ``make bench-baseline``
+stores benchmarks/baseline.json and ``make bench-compare`` compares a new
+run against it.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import warnings
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from manager import Manager, __version__
+from manager._validation import validate_messages, validate_tools
+
+MESSAGE_COUNTS = [10, 1000]
+CONTENT_SIZES = [64, 4096]
+TOOL_COUNTS = [0, 20]
+ENGINES = ["jinja", "native"]
+VALIDATION_COUNTS = [10, 1000, 10000]
+CLI_REQUESTS = [1, 500]
+REPEAT = 5
+
+Case = Tuple[str, Dict[str, Any], Callable[[], Any]]
+
+
+def _messages(count: int, size: int) -> List[Dict[str, str]]:
+    roles = ["user", "assistant"]
+    return [
+        {"role": roles[i % 2], "content": (f"Message {i} " * size)[:size]}
+        for i in range(count)
+    ]
+
+
+def _tools(count: int) -> List[Dict[str, Any]]:
+    return [
+        {
+            "type": "function",
+            "function": {
+                "name": f"tool_{i}",
+                "description": "A tool",
+                "parameters": {"type": "object", "properties": {}},
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def render_cases() -> Iterator[Case]:
+    for engine in ENGINES:
+        m = Manager(engine=engine)
+        for count, size, tool_count in itertools.product(
+            MESSAGE_COUNTS, CONTENT_SIZES, TOOL_COUNTS
+        ):
+            messages, tools = _messages(count, size), _tools(tool_count)
+            params = {
+                "engine": engine,
+                "messages": count,
+                "content": size,
+                "tools": tool_count,
+            }
+            yield (
+                "render_chat_completions",
+                params,
+                lambda m=m, messages=messages, tools=tools: m.render_chat_completions(
+                    "grok-4", messages, tools, temperature=0.7
+                ),
+            )
+            yield (
+                "render_responses",
+                params,
+                lambda m=m, messages=messages, tools=tools: m.render_responses(
+                    messages, tools, temperature=0.7
+                ),
+            )
+            yield (
+                "render_chat_with_tools",
+                params,
+                lambda m=m, messages=messages, tools=tools: m.render_chat_with_tools(
+                    "grok-4", messages, tools
+                ),
+            )
+
+
+def validation_cases() -> Iterator[Case]:
+    for count in VALIDATION_COUNTS:
+        messages = _messages(count, 64)
+        yield (
+            "validate_messages",
+            {"messages": count},
+            lambda messages=messages: validate_messages(messages),
+        )
+    for count in TOOL_COUNTS[1:] + [200]:
+        tools = _tools(count)
+        yield (
+            "validate_tools",
+            {"tools": count},
+            lambda tools=tools: validate_tools(tools),
+        )
+
+
+def _run_cli(args: List[str]) -> None:
+    subprocess.run(
+        [sys.executable, "-m", "manager.cli", *args],
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+
+
+def cli_cases(workdir: str) -> Iterator[Case]:
+    for count in CLI_REQUESTS:
+        if count == 1:
+            args = ["--message", "hi", "--temperature", "0.5"]
+        else:
+            path = os.path.join(workdir, f"requests_{count}.jsonl")
+            with open(path, "w") as f:
+                for i in range(count):
+                    spec = {
+                        "messages": _messages(10, 64),
+                        "kwargs": {"max_tokens": i + 1},
+                    }
+                    f.write(json.dumps(spec) + "\n")
+            args = ["--jsonl-in", path]
+        yield "manager_cli", {"requests": count}, lambda args=args: _run_cli(args)
+
+
+def case_id(name: str, params: Dict[str, Any]) -> str:
+    return name + "".join(f"[{key}={value}]" for key, value in params.items())
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """Best and median seconds per call over ``repeat`` timed rounds."""
+    number, _ = timeit.Timer(func).autorange()
+    times = sorted(
+        t / number for t in timeit.repeat(func, number=number, repeat=repeat)
+    )
+    return {"best": times[0], "median": times[len(times) // 2], "number": number}
+
+
+def run(filter_text: Optional[str], repeat: int) -> Dict[str, Any]:
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        cases = itertools.chain(render_cases(), validation_cases(), cli_cases(workdir))
+        for name, params, func in cases:
+            key = case_id(name, params)
+            if filter_text and filter_text not in key:
+                continue
+            timing = measure(func, repeat)
+            results[key] = {"name": name, "params": params, **timing}
+            print(f"{timing['best'] * 1e6:>14.1f} us  {key}", flush=True)
+    return {
+        "meta": {
+            "manager": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+    }
+
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], threshold: float
+) -> List[str]:
+    """Print the change of every case and return the ids that regressed."""
+    regressions = []
+    print(f"\n{'baseline us':>14} {'current us':>14} {'change':>8}  case")
+    for key, result in current["results"].items():
+        before = baseline["results"].get(key)
+        if before is None:
+            continue
+        ratio = result["best"] / before["best"]
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(
+            f"{before['best'] * 1e6:>14.1f} {result['best'] * 1e6:>14.1f} "
+            f"{ratio - 1:>+8.1%}  {key}{flag}"
+        )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="benchmarks/results.json")
+    parser.add_argument("--compare", metavar="BASELINE")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.15,
+        help="Allowed slowdown as a fraction of the baseline (default: 0.15)",
+    )
+    parser.add_argument("--filter", help="Only run cases whose id contains TEXT")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    args = parser.parse_args(argv)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        current = run(args.filter, args.repeat)
+    with open(args.output, "w") as f:
+        json.dump(current, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"wrote {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
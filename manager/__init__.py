@@ -1,12 +1,90 @@
 # SPDX-License-Identifier: MIT
 
 import os
+import threading
 import warnings
-from typing import Any, Dict, List
+from functools import partial
+from time import perf_counter
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
+from . import _validation
+from ._budget import Budget, fit_messages
+from ._cache import RenderCache, cache_key
+from ._conversation import Conversation
+from ._metrics import RenderEvent, RenderMetrics, payload_size
+from ._native import CHUNKERS as _NATIVE_CHUNKERS
+from ._native import RENDERERS as _NATIVE_RENDERERS
+from ._native import RawJSON, install_filters, tojson
+from ._sse import StreamDecoder
+from ._stream import compressor, encode_chunks, write_chunks
+from ._tools import ToolRegistry, ToolSelection
+from ._types import FunctionTool, Message
 from ._version import __version__
 
-__all__ = ["Manager", "__version__"]
+if TYPE_CHECKING:
+    from ._async import AsyncManager
+    from ._store import ContentStore
+
+__all__ = [
+    "AsyncManager",
+    "Budget",
+    "ContentStore",
+    "Conversation",
+    "FunctionTool",
+    "Manager",
+    "Message",
+    "RawJSON",
+    "RenderCache",
+    "RenderEvent",
+    "RenderMetrics",
+    "StreamDecoder",
+    "ToolRegistry",
+    "ToolSelection",
+    "__version__",
+]
+
+ENGINES = ("jinja", "native")
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "templates")
+
+# Inputs shared by all variants of a render_*_variants() call.
+_SHARED_INPUTS = frozenset(
+    ["messages", "input_messages", "tools", "template_name", "trusted", "budget"]
+)
+
+# Exports whose modules pull in heavy imports (asyncio) or are rarely used
+# are loaded on first access to keep ``import manager`` and manager-cli
+# startup fast.
+_LAZY_EXPORTS = {
+    "AsyncManager": "._async",
+    "ContentStore": "._store",
+}
+
+# The process-wide Manager behind Manager.shared(), created on first use.
+_shared: Optional["Manager"] = None
+_shared_lock = threading.Lock()
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
 
 
 class Manager:
@@ -16,42 +94,593 @@ class Manager:
     Supports both chat completions and responses endpoints.
     """
 
-    def __init__(self):
-        """Initialize the Manager with Jinja2 environment."""
-        from jinja2 import Environment, FileSystemLoader
+    def __init__(
+        self,
+        engine: str = "jinja",
+        precompile: bool = False,
+        bytecode_cache_dir: Optional[str] = None,
+        auto_reload: bool = True,
+        tool_registry: Optional[ToolRegistry] = None,
+        render_cache: Optional["RenderCache"] = None,
+        metrics: Optional[RenderMetrics] = None,
+        compiled_templates_dir: Optional[str] = None,
+        template_dirs: Optional[Iterable[str]] = None,
+        reload_interval: Optional[float] = None,
+        content_store: Optional["ContentStore"] = None,
+    ):
+        """Initialize the Manager with Jinja2 environment.
 
-        template_dir = os.path.join(os.path.dirname(__file__), "templates")
-        self.env = Environment(loader=FileSystemLoader(template_dir))
+        Args:
+            engine (str): Render engine. "jinja" renders every template through
+                Jinja2; "native" serializes the bundled templates directly and
+                falls back to Jinja2 for any other template name.
+            precompile (bool): Compile every template at init (see warmup()).
+                Compiled templates are only kept when ``auto_reload`` is off
+                or a ``reload_interval`` watcher is set; otherwise a
+                UserWarning is issued, since warming up has no lasting effect.
+            bytecode_cache_dir (str, optional): Directory where compiled template
+                bytecode is persisted and shared across processes.
+            auto_reload (bool): Check template files for changes on each lookup.
+                Disable in production to skip the stat calls and serve compiled
+                templates from an in-memory cache.
+            tool_registry (ToolRegistry, optional): Registry that tool names
+                passed as ``tools`` are resolved against. Defaults to a new,
+                empty registry.
+            render_cache (RenderCache, optional): Cache of rendered payloads
+                keyed by their inputs. A hit skips validation and rendering.
+            metrics (RenderMetrics, optional): Receives a RenderEvent with phase
+                timings and payload size for every render. Any object with a
+                ``record(event)`` method works. Disabled by default.
+            compiled_templates_dir (str, optional): Directory where templates
+                are cached as compiled Python modules, so later processes load
+                them without lexing or parsing any template source.
+            template_dirs (list, optional): Directories searched for templates
+                before the bundled ones. A template found there overrides the
+                bundled template of the same name, including its native
+                renderer.
+            reload_interval (float, optional): Seconds between background
+                checks of the template directories. Changed templates are
+                dropped from the in-memory cache; renders themselves make no
+                filesystem calls (``auto_reload`` is ignored).
+            content_store (ContentStore, optional): Store of large message
+                contents and tool lists with their serialized JSON, spliced
+                into later payloads that repeat them.
 
-    def _validate_messages(self, messages: List[Dict[str, str]]) -> None:
-        if not isinstance(messages, list):
-            raise ValueError("Messages must be a list")
-        for msg in messages:
-            if not isinstance(msg, dict):
-                raise ValueError("Each message must be a dict")
-            if "role" not in msg or "content" not in msg:
-                raise ValueError("Each message must have 'role' and 'content' keys")
-            if not isinstance(msg["role"], str) or not isinstance(msg["content"], str):
-                raise ValueError("'role' and 'content' must be strings")
+        Raises:
+            ValueError: If the engine is not supported or reload_interval is
+                not positive.
+        """
+        if engine not in ENGINES:
+            raise ValueError(
+                f"Unsupported engine: {engine}. Expected one of {', '.join(ENGINES)}."
+            )
+        if reload_interval is not None and reload_interval <= 0:
+            raise ValueError("reload_interval must be positive")
+        self.engine = engine
+        self.template_dirs = [*(template_dirs or ()), TEMPLATE_DIR]
+        self._options: Dict[str, Any] = dict(
+            engine=engine,
+            precompile=precompile,
+            bytecode_cache_dir=bytecode_cache_dir,
+            auto_reload=auto_reload,
+            tool_registry=tool_registry,
+            render_cache=render_cache,
+            metrics=metrics,
+            compiled_templates_dir=compiled_templates_dir,
+            template_dirs=template_dirs,
+            reload_interval=reload_interval,
+            content_store=content_store,
+        )
+        self.tool_registry = (
+            tool_registry if tool_registry is not None else ToolRegistry()
+        )
+        self.render_cache = render_cache
+        self.content_store = content_store
+        self.metrics = metrics
+        self._env: Any = None
+        self._env_lock = threading.Lock()
+        self._templates: Dict[str, Any] = {}
+        self._native_renderers = _NATIVE_RENDERERS
+        self._watcher: Any = None
+        if template_dirs or reload_interval is not None:
+            from ._watch import TemplateWatcher, template_index
 
-    def _validate_tools(self, tools: List[Dict[str, Any]]) -> None:
-        if not isinstance(tools, list):
-            raise ValueError("Tools must be a list")
-        for tool in tools:
-            if not isinstance(tool, dict):
-                raise ValueError("Each tool must be a dict")
-            if "type" not in tool:
-                raise ValueError("Each tool must have 'type' key")
-            if tool["type"] == "function":
-                if "function" not in tool:
-                    raise ValueError("Function tools must have 'function' key")
-                func = tool["function"]
-                if "name" not in func:
-                    raise ValueError("Function must have 'name' key")
+            if reload_interval is not None:
+                self._watcher = TemplateWatcher(
+                    self.template_dirs, reload_interval, self._templates_changed
+                )
+                self._native_renderers = self._unshadowed(self._watcher.index)
             else:
+                self._native_renderers = self._unshadowed(
+                    template_index(self.template_dirs)
+                )
+        if precompile:
+            if auto_reload and self._watcher is None:
+                warnings.warn(
+                    "precompile=True has no lasting effect with auto_reload=True, "
+                    "which re-checks every template on each render. Pass "
+                    "auto_reload=False to serve the compiled templates from memory.",
+                    UserWarning,
+                    stacklevel=2,
+                )
+            self.warmup()
+
+    @classmethod
+    def shared(cls) -> "Manager":
+        """Return the process-wide Manager, creating it on first use.
+
+        Modules that render with the default settings should share this
+        instance rather than constructing their own, so templates are
+        compiled once per process. It uses the native engine (output is
+        identical to Jinja2) and keeps compiled templates in memory
+        (``auto_reload=False``). It is safe to use from several threads.
+
+        After ``os.fork()`` the child keeps the parent's instance with its
+        compiled templates, and its locks and template watcher are
+        re-initialized, so a lock held by a parent thread at fork time
+        cannot deadlock the child.
+
+        Returns:
+            Manager: The shared instance, or the one installed with
+            set_shared().
+        """
+        global _shared
+        manager = _shared
+        if manager is None:
+            with _shared_lock:
+                manager = _shared
+                if manager is None:
+                    manager = _shared = Manager(engine="native", auto_reload=False)
+        return manager
+
+    @staticmethod
+    def set_shared(manager: Optional["Manager"]) -> None:
+        """Install the Manager returned by shared(), e.g. one configured with
+        a render cache. None resets it to be created lazily again."""
+        global _shared
+        with _shared_lock:
+            _shared = manager
+
+    def _after_fork(self) -> None:
+        # Threads other than the forking one do not exist in the child, so
+        # locks they held stay locked forever, and the watcher thread is gone.
+        self._env_lock = threading.Lock()
+        if isinstance(self.metrics, RenderMetrics):
+            self.metrics._lock = threading.Lock()
+        if isinstance(self.render_cache, RenderCache):
+            self.render_cache._lock = threading.Lock()
+        if self.content_store is not None:
+            self.content_store._lock = threading.Lock()
+        watcher = self._watcher
+        if watcher is not None:
+            from ._watch import TemplateWatcher
+
+            self._watcher = TemplateWatcher(
+                watcher.dirs, watcher.interval, self._templates_changed
+            )
+            if self._watcher.index != watcher.index:
+                self._templates_changed(self._watcher.index)
+
+    def _unshadowed(self, index: Dict[str, Any]) -> Dict[str, Callable[..., str]]:
+        # Native renderers reproduce the bundled templates, so they only serve
+        # names that no user template directory overrides.
+        bundled = len(self.template_dirs) - 1
+        return {
+            name: renderer
+            for name, renderer in _NATIVE_RENDERERS.items()
+            if index.get(name, (bundled,))[0] == bundled
+        }
+
+    def _templates_changed(self, index: Dict[str, Any]) -> None:
+        # Called from the watcher thread. Everything compiled is dropped,
+        # since a change to one template can affect any template that
+        # extends or includes it; the next lookup recreates the environment.
+        self._native_renderers = self._unshadowed(index)
+        self._env = None
+        self._templates = {}
+        if self.render_cache is not None:
+            self.render_cache.clear()
+
+    @property
+    def env(self) -> Any:
+        """The Jinja2 Environment, created on first use.
+
+        Renders served entirely by the native engine never import Jinja2.
+        """
+        env = self._env
+        if env is None:
+            # Threads racing on first use would each build an environment
+            # and compile every template separately.
+            with self._env_lock:
+                env = self._env
+                if env is None:
+                    env = self._env = self._create_env()
+        return env
+
+    def _create_env(self) -> Any:
+        from jinja2 import (
+            ChoiceLoader,
+            Environment,
+            FileSystemBytecodeCache,
+            FileSystemLoader,
+            ModuleLoader,
+        )
+
+        options = self._options
+        self._source_loader = FileSystemLoader(self.template_dirs)
+        bytecode_cache = None
+        if options["bytecode_cache_dir"] is not None:
+            os.makedirs(options["bytecode_cache_dir"], exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(options["bytecode_cache_dir"])
+        env = Environment(
+            loader=self._source_loader,
+            auto_reload=options["auto_reload"] and self._watcher is None,
+            bytecode_cache=bytecode_cache,
+        )
+        install_filters(env)
+        if options["compiled_templates_dir"] is not None:
+            from ._compiled import ensure_compiled
+
+            compiled = ensure_compiled(
+                env, options["compiled_templates_dir"], self.template_dirs
+            )
+            env.loader = ChoiceLoader([ModuleLoader(compiled), self._source_loader])
+        return env
+
+    def warmup(self) -> List[str]:
+        """Compile every available template ahead of the first render.
+
+        Call this at worker start (e.g. after fork) so no request pays for
+        template compilation. With a bytecode cache configured, compiled
+        templates are written to disk and reused by later processes.
+
+        Returns:
+            list: Names of the compiled templates.
+        """
+        self.env  # creates the environment and its source loader
+        names = self._source_loader.list_templates()
+        for name in names:
+            self._get_template(name)
+        return names
+
+    def _get_template(self, template_name: str) -> Any:
+        # The cache is read before the environment: _templates_changed()
+        # resets them in the opposite order, so a template compiled from a
+        # stale environment never lands in the fresh cache.
+        templates = self._templates
+        template = templates.get(template_name)
+        if template is None:
+            env = self.env
+            template = env.get_template(template_name)
+            if not env.auto_reload:
+                templates[template_name] = template
+        return template
+
+    def _native_renderer(self, template_name: str) -> Optional[Callable[..., str]]:
+        return self._native_renderers.get(template_name)
+
+    def _lookup(self, template_name: str) -> Callable[[Dict[str, Any]], str]:
+        if self.engine == "native":
+            renderer = self._native_renderer(template_name)
+            if renderer is not None:
+                return renderer
+        return self._get_template(template_name).render
+
+    def _native_chunks(self, template_name: str) -> bool:
+        return self.engine == "native" and bool(self._native_renderer(template_name))
+
+    def _lookup_chunks(
+        self, template_name: str
+    ) -> Callable[[Dict[str, Any]], Iterable[str]]:
+        if self._native_chunks(template_name):
+            chunks = _NATIVE_CHUNKERS[template_name]
+            if self.content_store is not None:
+                # Message slices are serialized through the store as they
+                # are generated.
+                return partial(chunks, encode=self.content_store.messages_json)
+            return chunks
+        return self._get_template(template_name).generate
+
+    def _store_messages(self, template_name: str, messages: Any, chunked: bool) -> Any:
+        # Serialize messages through the content store up front, unless the
+        # native chunker does so slice by slice.
+        if (
+            self.content_store is None
+            or type(messages) is not list
+            or (chunked and self._native_chunks(template_name))
+        ):
+            return messages
+        return self.content_store.messages_json(messages)
+
+    def _render(self, template_name: str, context: Dict[str, Any]) -> str:
+        return self._lookup(template_name)(context)
+
+    def _validate_messages(
+        self, messages: List[Dict[str, str]], responses: bool = False
+    ) -> None:
+        _validation.validate_messages(messages, items=responses)
+
+    def _validate_tools(self, tools: List[Dict[str, Any]]) -> None:
+        _validation.validate_tools(tools)
+
+    def _validate_params(self, params: Dict[str, Any]) -> None:
+        _validation.validate_params(params)
+
+    def validate(
+        self,
+        messages: List[Dict[str, str]],
+        tools: List[Dict[str, Any]] = None,
+        responses: bool = False,
+        **kwargs: Any,
+    ) -> None:
+        """Validate render inputs up front, e.g. before rendering with trusted=True.
+
+        Args:
+            messages (list): List of message dicts with 'role' and 'content'.
+            tools (list, optional): List of tool dicts.
+            responses (bool): Validate for render_responses(), which also
+                accepts ``function_call`` and ``function_call_output`` items.
+            **kwargs: Generation parameters (temperature, max_tokens, stream).
+
+        Raises:
+            ValueError: If inputs do not meet validation requirements. The
+                message names the path of the first failing element.
+        """
+        self._validate_messages(messages, responses)
+        if tools:
+            self._validate_tools(tools)
+        self._validate_params(kwargs)
+
+    def _prepare_tools(self, tools: Any, validate: bool = True) -> Any:
+        # Registry handles and tool-name lists resolve to pre-rendered JSON
+        # that skips validation, as do tool lists held by the content store;
+        # anything else is validated as given. Names missing from the
+        # registry raise "Unknown tool".
+        if isinstance(tools, ToolRegistry):
+            return tools.select().json
+        if isinstance(tools, list) and tools and all(isinstance(t, str) for t in tools):
+            if not self.tool_registry:
                 raise ValueError(
-                    f"Unsupported tool type: {tool['type']}. Only 'function' type is supported."
+                    f"Unknown tool: {tools[0]}. Each tool must be a dict, or the "
+                    "name of a tool registered on Manager.tool_registry "
+                    "(at tools[0])"
+                )
+            return self.tool_registry.select(tools).json
+        store = self.content_store
+        if store is not None and tools and tools.__class__ is list:
+            encoded = store.tools_json(tools)
+            if encoded is None:
+                if validate:
+                    self._validate_tools(tools)
+                encoded = store.add_tools(tools)
+            return encoded
+        if tools and validate:
+            self._validate_tools(tools)
+        return tools
+
+    def _cache_key(
+        self,
+        method: str,
+        template_name: str,
+        model: Any,
+        messages: Any,
+        tools: Any,
+        kwargs: Dict[str, Any],
+        budget: Optional[Budget] = None,
+    ) -> Optional[str]:
+        if self.render_cache is None or type(messages) is not list:
+            return None
+        kind = "list"
+        if isinstance(tools, ToolRegistry):
+            kind, tools = "registry", tools.select().digest
+        elif (
+            isinstance(tools, list) and tools and all(isinstance(t, str) for t in tools)
+        ):
+            try:
+                kind, tools = "names", self.tool_registry.select(tools).digest
+            except ValueError:
+                return None
+        return cache_key(
+            method,
+            template_name,
+            model,
+            messages,
+            kind,
+            tools,
+            kwargs,
+            None if budget is None else budget.key(),
+        )
+
+    def _validate_request(
+        self,
+        method: str,
+        model: Any,
+        messages: Any,
+        tools: Any,
+        kwargs: Dict[str, Any],
+    ) -> Any:
+        self._validate_messages(messages, method == "responses")
+        if method == "chat_with_tools":
+            self._validate_tools_legacy(tools)
+        else:
+            tools = self._prepare_tools(tools)
+        if method != "responses" and not isinstance(model, str):
+            raise ValueError("Model must be a string")
+        self._validate_params(kwargs)
+        return tools
+
+    def _context(
+        self,
+        method: str,
+        model: Any,
+        messages: Any,
+        tools: Any,
+        kwargs: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        if method == "responses":
+            return dict(input=messages, tools=tools, **kwargs)
+        return dict(model=model, messages=messages, tools=tools, **kwargs)
+
+    def _fit_budget(
+        self,
+        budget: Budget,
+        method: str,
+        template_name: str,
+        model: Any,
+        messages: Any,
+        tools: Any,
+        kwargs: Dict[str, Any],
+    ) -> Tuple[RawJSON, Any]:
+        # Measure the payload frame by rendering it around an empty messages
+        # slot, then serialize only the messages that fit. Both are spliced
+        # into the final render as RawJSON, so nothing is serialized twice.
+        if tools is not None and type(tools) is not RawJSON:
+            tools = RawJSON(tojson(tools))
+        context = self._context(method, model, RawJSON(""), tools, kwargs)
+        overhead = payload_size(self._lookup(template_name)(context))
+        messages_json, _ = fit_messages(budget, messages, overhead)
+        return messages_json, tools
+
+    def _render_request(
+        self,
+        method: str,
+        template_name: str,
+        model: Any,
+        messages: Any,
+        tools: Any,
+        kwargs: Dict[str, Any],
+        trusted: bool = False,
+        emit: Optional[Callable[[Iterable[str]], Any]] = None,
+        budget: Optional[Budget] = None,
+    ) -> Any:
+        # Without ``emit`` the payload is returned as a str and may be cached;
+        # otherwise the rendered chunks are handed to ``emit`` and its result
+        # (bytes, or a count of bytes written) is returned.
+        key = self._cache_key(
+            method, template_name, model, messages, tools, kwargs, budget
+        )
+        if key is not None:
+            payload = self.render_cache.get(key)
+            if payload is not None:
+                result = payload if emit is None else emit((payload,))
+                if self.metrics is not None:
+                    self.metrics.record(
+                        RenderEvent(
+                            method,
+                            template_name,
+                            None,
+                            None,
+                            None,
+                            payload_size(result),
+                            cache_hit=True,
+                        )
+                    )
+                return result
+        if self.metrics is not None:
+            result = self._render_instrumented(
+                method,
+                template_name,
+                model,
+                messages,
+                tools,
+                kwargs,
+                trusted,
+                emit,
+                budget,
+            )
+        else:
+            if trusted:
+                tools = self._prepare_tools(tools, validate=False)
+            else:
+                tools = self._validate_request(method, model, messages, tools, kwargs)
+            if budget is not None:
+                messages, tools = self._fit_budget(
+                    budget, method, template_name, model, messages, tools, kwargs
+                )
+            else:
+                messages = self._store_messages(
+                    template_name, messages, emit is not None
                 )
+            context = self._context(method, model, messages, tools, kwargs)
+            if emit is None:
+                result = self._render(template_name, context)
+            else:
+                result = emit(self._lookup_chunks(template_name)(context))
+        if key is not None and emit is None:
+            self.render_cache.set(key, result)
+        return result
+
+    def _render_instrumented(
+        self,
+        method: str,
+        template_name: str,
+        model: Any,
+        messages: Any,
+        tools: Any,
+        kwargs: Dict[str, Any],
+        trusted: bool,
+        emit: Optional[Callable[[Iterable[str]], Any]],
+        budget: Optional[Budget],
+    ) -> Any:
+        try:
+            start = perf_counter()
+            if trusted:
+                tools = self._prepare_tools(tools, validate=False)
+            else:
+                tools = self._validate_request(method, model, messages, tools, kwargs)
+            validated = perf_counter()
+            if emit is None:
+                render = self._lookup(template_name)
+            else:
+                render = self._lookup_chunks(template_name)
+            found = perf_counter()
+            # Fitting a budget serializes the kept messages, so it is timed
+            # as part of the render.
+            if budget is not None:
+                messages, tools = self._fit_budget(
+                    budget, method, template_name, model, messages, tools, kwargs
+                )
+            else:
+                messages = self._store_messages(
+                    template_name, messages, emit is not None
+                )
+            result = render(self._context(method, model, messages, tools, kwargs))
+            if emit is not None:
+                result = emit(result)
+            rendered = perf_counter()
+        except Exception:
+            self.metrics.record_error()
+            raise
+        self.metrics.record(
+            RenderEvent(
+                method,
+                template_name,
+                validated - start,
+                found - validated,
+                rendered - found,
+                payload_size(result),
+            )
+        )
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of render metrics and cache and store counters.
+
+        Returns:
+            dict: "renders" holds the metrics snapshot (call counts, per-template
+            counts and p50/p90/p99 summaries of phase timings in milliseconds
+            and payload sizes) when metrics are enabled; "cache" holds the
+            render cache counters when a cache is configured, and "store"
+            the content store counters when a store is.
+        """
+        stats: Dict[str, Any] = {}
+        if self.metrics is not None and hasattr(self.metrics, "snapshot"):
+            stats["renders"] = self.metrics.snapshot()
+        if self.render_cache is not None:
+            stats["cache"] = self.render_cache.stats()
+        if self.content_store is not None:
+            stats["store"] = self.content_store.stats()
+        return stats
 
     def render_chat_completions(
         self,
@@ -59,76 +688,426 @@ class Manager:
         messages: List[Dict[str, str]],
         tools: List[Dict[str, Any]] = None,
         template_name: str = "chat_completions.jinja",
+        trusted: bool = False,
+        budget: Optional[Budget] = None,
         **kwargs: Any,
     ) -> str:
         """Render a JSON payload for xAI /v1/chat/completions endpoint.
 
         Args:
             model (str): The model name (e.g., "grok-4").
-            messages (list): List of message dicts with 'role' and 'content'.
-            tools (list, optional): List of tool dicts in OpenAI format.
+            messages (list): List of message dicts with 'role' and 'content',
+                or Message objects.
+            tools (list, optional): List of tool dicts in OpenAI format or
+                FunctionTool objects, a ToolRegistry, or names of tools in
+                ``tool_registry``.
             template_name (str): Name of the Jinja2 template to use.
+            trusted (bool): Skip validation for inputs the caller has already
+                validated (see validate()).
+            budget (Budget, optional): Payload size or token budget. The
+                oldest non-system messages that do not fit are dropped before
+                rendering.
             **kwargs: Additional parameters (temperature, max_tokens, stream, etc.).
 
         Returns:
             str: The rendered JSON payload.
 
         Raises:
-            ValueError: If inputs do not meet validation requirements.
+            ValueError: If inputs do not meet validation requirements, or the
+                messages cannot fit the budget.
         """
-        self._validate_messages(messages)
-        if tools:
-            self._validate_tools(tools)
-        if not isinstance(model, str):
-            raise ValueError("Model must be a string")
-        template = self.env.get_template(template_name)
-        return template.render(model=model, messages=messages, tools=tools, **kwargs)
+        return self._render_request(
+            "chat_completions",
+            template_name,
+            model,
+            messages,
+            tools,
+            kwargs,
+            trusted,
+            budget=budget,
+        )
 
     def render_responses(
         self,
         input_messages: List[Dict[str, str]],
         tools: List[Dict[str, Any]] = None,
         template_name: str = "responses.jinja",
+        trusted: bool = False,
+        budget: Optional[Budget] = None,
         **kwargs: Any,
     ) -> str:
         """Render a JSON payload for xAI /v1/responses endpoint.
 
         Args:
-            input_messages (list): List of message dicts with 'role' and 'content'.
-            tools (list, optional): List of tool dicts in xAI format.
+            input_messages (list): List of message dicts with 'role' and 'content',
+                or Message objects.
+            tools (list, optional): List of tool dicts in xAI format or
+                FunctionTool objects, a ToolRegistry, or names of tools in
+                ``tool_registry``.
             template_name (str): Name of the Jinja2 template to use.
+            trusted (bool): Skip validation for inputs the caller has already
+                validated (see validate()).
+            budget (Budget, optional): Payload size or token budget. The
+                oldest non-system messages that do not fit are dropped before
+                rendering.
             **kwargs: Additional parameters (temperature, max_tokens, stream, etc.).
 
         Returns:
             str: The rendered JSON payload.
 
         Raises:
-            ValueError: If inputs do not meet validation requirements.
+            ValueError: If inputs do not meet validation requirements, or the
+                messages cannot fit the budget.
         """
-        self._validate_messages(input_messages)
-        if tools:
-            self._validate_tools(tools)
-        template = self.env.get_template(template_name)
-        return template.render(input=input_messages, tools=tools, **kwargs)
+        return self._render_request(
+            "responses",
+            template_name,
+            None,
+            input_messages,
+            tools,
+            kwargs,
+            trusted,
+            budget=budget,
+        )
+
+    def render_chat_completions_to(
+        self,
+        fp: IO[Any],
+        model: str,
+        messages: List[Dict[str, str]],
+        tools: List[Dict[str, Any]] = None,
+        template_name: str = "chat_completions.jinja",
+        trusted: bool = False,
+        budget: Optional[Budget] = None,
+        compress: Optional[str] = None,
+        **kwargs: Any,
+    ) -> int:
+        """Render a /v1/chat/completions payload straight into a file object.
+
+        The payload is written in UTF-8 chunks as it is generated and never
+        built as a whole string. Arguments match render_chat_completions().
+
+        Args:
+            fp: Binary file-like object (e.g. a socket file, an io.BytesIO
+                reused across calls, sys.stdout.buffer). Text file objects
+                receive str chunks instead.
+            compress (str, optional): "gzip" or "zstd" (with the zstandard
+                package) to write the payload compressed. Chunks are
+                compressed as they are generated, so the uncompressed
+                payload is never held in full. Requires a binary fp.
+
+        Returns:
+            int: Number of bytes (characters for text files) written.
+
+        Raises:
+            ValueError: If inputs do not meet validation requirements, or the
+                compression is unsupported.
+        """
+        return self._render_request(
+            "chat_completions",
+            template_name,
+            model,
+            messages,
+            tools,
+            kwargs,
+            trusted,
+            emit=partial(write_chunks, fp, compress=_compressor(compress)),
+            budget=budget,
+        )
+
+    def render_chat_completions_bytes(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        tools: List[Dict[str, Any]] = None,
+        template_name: str = "chat_completions.jinja",
+        trusted: bool = False,
+        budget: Optional[Budget] = None,
+        compress: Optional[str] = None,
+        **kwargs: Any,
+    ) -> bytes:
+        """Render a /v1/chat/completions payload as UTF-8 bytes.
+
+        Chunks are encoded as they are generated, skipping the intermediate
+        str. Arguments match render_chat_completions().
+
+        Args:
+            compress (str, optional): "gzip" or "zstd" (with the zstandard
+                package) to return the payload compressed. Chunks are
+                compressed as they are encoded, so only the compressed output
+                accumulates.
+
+        Raises:
+            ValueError: If inputs do not meet validation requirements, or the
+                compression is unsupported.
+        """
+        return self._render_request(
+            "chat_completions",
+            template_name,
+            model,
+            messages,
+            tools,
+            kwargs,
+            trusted,
+            emit=partial(encode_chunks, compress=_compressor(compress)),
+            budget=budget,
+        )
+
+    def render_responses_to(
+        self,
+        fp: IO[Any],
+        input_messages: List[Dict[str, str]],
+        tools: List[Dict[str, Any]] = None,
+        template_name: str = "responses.jinja",
+        trusted: bool = False,
+        budget: Optional[Budget] = None,
+        compress: Optional[str] = None,
+        **kwargs: Any,
+    ) -> int:
+        """Render a /v1/responses payload straight into a file object.
+
+        See render_chat_completions_to(); arguments match render_responses(),
+        plus ``compress``.
+
+        Returns:
+            int: Number of bytes (characters for text files) written.
+
+        Raises:
+            ValueError: If inputs do not meet validation requirements, or the
+                compression is unsupported.
+        """
+        return self._render_request(
+            "responses",
+            template_name,
+            None,
+            input_messages,
+            tools,
+            kwargs,
+            trusted,
+            emit=partial(write_chunks, fp, compress=_compressor(compress)),
+            budget=budget,
+        )
+
+    def render_responses_bytes(
+        self,
+        input_messages: List[Dict[str, str]],
+        tools: List[Dict[str, Any]] = None,
+        template_name: str = "responses.jinja",
+        trusted: bool = False,
+        budget: Optional[Budget] = None,
+        compress: Optional[str] = None,
+        **kwargs: Any,
+    ) -> bytes:
+        """Render a /v1/responses payload as UTF-8 bytes.
+
+        Arguments match render_responses(), plus ``compress`` as in
+        render_chat_completions_bytes().
+
+        Raises:
+            ValueError: If inputs do not meet validation requirements, or the
+                compression is unsupported.
+        """
+        return self._render_request(
+            "responses",
+            template_name,
+            None,
+            input_messages,
+            tools,
+            kwargs,
+            trusted,
+            emit=partial(encode_chunks, compress=_compressor(compress)),
+            budget=budget,
+        )
+
+    def render_chat_completions_variants(
+        self,
+        messages: List[Dict[str, str]],
+        variants: Iterable[Dict[str, Any]],
+        tools: List[Dict[str, Any]] = None,
+        template_name: str = "chat_completions.jinja",
+        trusted: bool = False,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Render one /v1/chat/completions payload per variant of shared inputs.
+
+        For fan-out such as best-of-N sampling or model A/B tests, the
+        messages and tools are validated and serialized once, and each
+        variant only renders its own scalar fields around them. Each
+        payload is identical to the render_chat_completions() output for
+        the same arguments.
+
+        Args:
+            messages (list): Messages shared by every variant.
+            variants (iterable): Dicts of per-variant ``model`` and parameter
+                overrides, e.g. ``{"model": "grok-4", "temperature": 0.2}``.
+            tools (list, optional): Tools shared by every variant, as for
+                render_chat_completions().
+            template_name (str): Name of the Jinja2 template to use.
+            trusted (bool): Skip validation of inputs the caller has already
+                validated.
+            **kwargs: Parameters shared by every variant, including ``model``.
+
+        Returns:
+            list: Rendered payloads in variant order.
+
+        Raises:
+            ValueError: If inputs or any variant do not meet validation
+                requirements.
+        """
+        return self._render_variants(
+            "chat_completions",
+            template_name,
+            messages,
+            tools,
+            variants,
+            kwargs,
+            trusted,
+        )
+
+    def render_responses_variants(
+        self,
+        input_messages: List[Dict[str, str]],
+        variants: Iterable[Dict[str, Any]],
+        tools: List[Dict[str, Any]] = None,
+        template_name: str = "responses.jinja",
+        trusted: bool = False,
+        **kwargs: Any,
+    ) -> List[str]:
+        """Render one /v1/responses payload per variant of shared inputs.
+
+        See render_chat_completions_variants(); variants override parameters
+        such as ``temperature`` and ``max_tokens``.
+
+        Raises:
+            ValueError: If inputs or any variant do not meet validation
+                requirements.
+        """
+        return self._render_variants(
+            "responses", template_name, input_messages, tools, variants, kwargs, trusted
+        )
+
+    def _render_variants(
+        self,
+        method: str,
+        template_name: str,
+        messages: Any,
+        tools: Any,
+        variants: Iterable[Dict[str, Any]],
+        kwargs: Dict[str, Any],
+        trusted: bool,
+    ) -> List[str]:
+        requests = []
+        for variant in variants:
+            params = {**kwargs, **variant}
+            shared = _SHARED_INPUTS.intersection(params)
+            if shared:
+                raise ValueError(
+                    "Variants may only set the model and generation parameters, "
+                    f"not {', '.join(sorted(shared))}"
+                )
+            model = params.pop("model", None) if method != "responses" else None
+            requests.append((model, params))
+        if trusted:
+            tools = self._prepare_tools(tools, validate=False)
+        else:
+            self._validate_messages(messages, method == "responses")
+            tools = self._prepare_tools(tools)
+            for model, params in requests:
+                if method != "responses" and not isinstance(model, str):
+                    raise ValueError("Model must be a string")
+                self._validate_params(params)
+        # The shared body is serialized once; each variant then renders only
+        # its frame and splices the body in.
+        if self.content_store is not None and type(messages) is list:
+            messages_json = self.content_store.messages_json(messages)
+        else:
+            messages_json = RawJSON(tojson(messages))
+        if tools is not None and type(tools) is not RawJSON:
+            tools = RawJSON(tojson(tools))
+        return [
+            self._render_request(
+                method, template_name, model, messages_json, tools, params, True
+            )
+            for model, params in requests
+        ]
+
+    def conversation(
+        self,
+        model: str,
+        tools: List[Dict[str, Any]] = None,
+        template_name: str = "chat_completions.jinja",
+        **kwargs: Any,
+    ) -> Conversation:
+        """Start an incremental /v1/chat/completions payload builder.
+
+        Args:
+            model (str): The model name (e.g., "grok-4").
+            tools (list, optional): List of tool dicts in OpenAI format.
+            template_name (str): Name of the Jinja2 template to use.
+            **kwargs: Default parameters for every render (temperature, ...).
+
+        Returns:
+            Conversation: Builder that validates and serializes each appended
+            message once.
+        """
+        return Conversation(self, model, tools, template_name, **kwargs)
+
+    def render_chat_completions_batch(
+        self,
+        requests: List[Dict[str, Any]],
+        workers: Optional[int] = None,
+        executor: str = "thread",
+    ) -> List[Union[str, Exception]]:
+        """Render many /v1/chat/completions payloads in parallel.
+
+        Args:
+            requests (list): Request specs, each a dict of render_chat_completions()
+                keyword arguments (model, messages, tools, template_name, ...).
+            workers (int, optional): Pool size. Defaults to the executor's default.
+            executor (str): "thread" or "process". Process workers each build
+                one Manager with this Manager's options and reuse it.
+
+        Returns:
+            list: Rendered payloads in input order. Items that fail hold the
+            raised exception instead of a payload.
+
+        Raises:
+            ValueError: If the executor is not supported.
+        """
+        from ._batch import render_batch
+
+        return render_batch(
+            self, "render_chat_completions", requests, workers, executor
+        )
+
+    def render_responses_batch(
+        self,
+        requests: List[Dict[str, Any]],
+        workers: Optional[int] = None,
+        executor: str = "thread",
+    ) -> List[Union[str, Exception]]:
+        """Render many /v1/responses payloads in parallel.
+
+        Args:
+            requests (list): Request specs, each a dict of render_responses()
+                keyword arguments (input_messages, tools, template_name, ...).
+            workers (int, optional): Pool size. Defaults to the executor's default.
+            executor (str): "thread" or "process".
+
+        Returns:
+            list: Rendered payloads in input order. Items that fail hold the
+            raised exception instead of a payload.
+
+        Raises:
+            ValueError: If the executor is not supported.
+        """
+        from ._batch import render_batch
+
+        return render_batch(self, "render_responses", requests, workers, executor)
 
     def _validate_tools_legacy(self, tools: List[Dict[str, Any]]) -> None:
         """Legacy validation for backward compatibility."""
-        if not isinstance(tools, list):
-            raise ValueError("Tools must be a list")
-        for tool in tools:
-            if not isinstance(tool, dict):
-                raise ValueError("Each tool must be a dict")
-            if "type" not in tool:
-                raise ValueError("Each tool must have 'type' key")
-            if tool["type"] == "function":
-                if "function" not in tool:
-                    raise ValueError("Function tools must have 'function' key")
-                func = tool["function"]
-                if "name" not in func:
-                    raise ValueError("Function must have 'name' key")
-            # Legacy format support
-            elif "name" not in tool:
-                raise ValueError("Each tool must have 'name' key")
+        _validation.validate_tools_legacy(tools)
 
     # Legacy method for backward compatibility
     def render_chat_with_tools(
@@ -149,9 +1128,21 @@ class Manager:
             DeprecationWarning,
             stacklevel=2,
         )
-        self._validate_messages(messages)
-        self._validate_tools_legacy(tools)
-        if not isinstance(model, str):
-            raise ValueError("Model must be a string")
-        template = self.env.get_template(template_name)
-        return template.render(model=model, messages=messages, tools=tools, **kwargs)
+        return self._render_request(
+            "chat_with_tools", template_name, model, messages, tools, kwargs
+        )
+
+
+def _compressor(method: Optional[str]) -> Any:
+    return None if method is None else compressor(method)
+
+
+def _after_fork_in_child() -> None:
+    global _shared_lock
+    _shared_lock = threading.Lock()
+    if _shared is not None:
+        _shared._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,120 @@
+# SPDX-License-Identifier: MIT
+
+"""asyncio front end for Manager."""
+
+import asyncio
+import weakref
+from concurrent.futures import Executor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+
+class AsyncManager:
+    """Awaitable rendering for event-loop based servers.
+
+    Small payloads render inline, since handing them to a thread costs more
+    than rendering them. Payloads with at least ``offload_threshold`` messages
+    render on an executor so the event loop keeps running, and at most
+    ``max_concurrency`` of them are in flight at once.
+
+    Jinja2's async mode is not used: the bundled templates emit the history
+    as one ``tojson`` chunk, so it would not yield during the expensive part.
+    """
+
+    def __init__(
+        self,
+        manager: Any = None,
+        max_concurrency: int = 4,
+        offload_threshold: int = 64,
+        executor: Optional[Executor] = None,
+    ):
+        """Initialize the async front end.
+
+        Args:
+            manager (Manager, optional): Manager to render with. Defaults to
+                Manager.shared().
+            max_concurrency (int): Maximum number of offloaded renders running
+                at once.
+            offload_threshold (int): Message count from which renders run on
+                the executor instead of inline.
+            executor (Executor, optional): Executor for offloaded renders.
+                Defaults to the event loop's default executor.
+
+        Raises:
+            ValueError: If max_concurrency is not positive.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be positive")
+        if manager is None:
+            from . import Manager
+
+            manager = Manager.shared()
+        self.manager = manager
+        self.max_concurrency = max_concurrency
+        self.offload_threshold = offload_threshold
+        self.executor = executor
+        self._semaphores: "weakref.WeakKeyDictionary[Any, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _semaphore(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        # Semaphores are bound to the loop they are first used on.
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    async def _run(self, size: int, render: Callable[[], str]) -> str:
+        if size < self.offload_threshold:
+            return render()
+        loop = asyncio.get_running_loop()
+        async with self._semaphore(loop):
+            return await loop.run_in_executor(self.executor, render)
+
+    async def render_chat_completions(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        tools: List[Dict[str, Any]] = None,
+        template_name: str = "chat_completions.jinja",
+        **kwargs: Any,
+    ) -> str:
+        """Awaitable Manager.render_chat_completions().
+
+        Raises:
+            ValueError: If inputs do not meet validation requirements.
+        """
+        render = partial(
+            self.manager.render_chat_completions,
+            model,
+            messages,
+            tools,
+            template_name,
+            **kwargs,
+        )
+        return await self._run(_size(messages), render)
+
+    async def render_responses(
+        self,
+        input_messages: List[Dict[str, str]],
+        tools: List[Dict[str, Any]] = None,
+        template_name: str = "responses.jinja",
+        **kwargs: Any,
+    ) -> str:
+        """Awaitable Manager.render_responses().
+
+        Raises:
+            ValueError: If inputs do not meet validation requirements.
+        """
+        render = partial(
+            self.manager.render_responses,
+            input_messages,
+            tools,
+            template_name,
+            **kwargs,
+        )
+        return await self._run(_size(input_messages), render)
+
+
+def _size(messages: Any) -> int:
+    return len(messages) if isinstance(messages, list) else 0
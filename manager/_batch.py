@@ -0,0 +1,67 @@
+# SPDX-License-Identifier: MIT
+
+"""Parallel fan-out for batch rendering."""
+
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Optional, Union
+
+EXECUTORS = ("thread", "process")
+
+# Per-process Manager, created once by the pool initializer.
+_worker_manager = None
+
+
+def _init_worker(options: Dict[str, Any]) -> None:
+    global _worker_manager
+    from . import Manager
+
+    _worker_manager = Manager(**options)
+
+
+def render_one(
+    manager: Any, method: str, spec: Dict[str, Any]
+) -> Union[str, Exception]:
+    try:
+        return getattr(manager, method)(**spec)
+    except Exception as exc:
+        return exc
+
+
+def _render_in_worker(method: str, spec: Dict[str, Any]) -> Union[str, Exception]:
+    result = render_one(_worker_manager, method, spec)
+    if isinstance(result, Exception):
+        try:
+            pickle.dumps(result)
+        except Exception:
+            result = RuntimeError(f"{type(result).__name__}: {result}")
+    return result
+
+
+def render_batch(
+    manager: Any,
+    method: str,
+    requests: List[Dict[str, Any]],
+    workers: Optional[int],
+    executor: str,
+) -> List[Union[str, Exception]]:
+    if executor not in EXECUTORS:
+        raise ValueError(
+            f"Unsupported executor: {executor}. Expected one of {', '.join(EXECUTORS)}."
+        )
+    requests = list(requests)
+    if not requests:
+        return []
+    if executor == "thread":
+        with ThreadPoolExecutor(workers) as pool:
+            return list(pool.map(partial(render_one, manager, method), requests))
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(requests) // (workers * 4))
+    with ProcessPoolExecutor(
+        workers, initializer=_init_worker, initargs=(manager._options,)
+    ) as pool:
+        return list(
+            pool.map(partial(_render_in_worker, method), requests, chunksize=chunksize)
+        )
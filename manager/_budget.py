@@ -0,0 +1,198 @@
+# SPDX-License-Identifier: MIT
+
+"""Fitting message histories into a payload size or token budget."""
+
+from typing import Any, Callable, List, Optional, Tuple
+
+from ._native import RawJSON, message_json, tojson
+
+_SEPARATOR = len(", ")
+
+
+class Budget:
+    """Limit on the rendered payload size, enforced before rendering.
+
+    When the payload would exceed the limit, the oldest non-system messages
+    are dropped until it fits; system messages and the most recent messages
+    are kept. Tool calls are dropped together with their results. Tokens
+    are estimated from the serialized payload size at ``bytes_per_token``
+    (about 4 for English text), which slightly overestimates since JSON
+    syntax is counted too.
+    """
+
+    __slots__ = ("max_bytes", "max_tokens", "bytes_per_token", "placeholder")
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+        bytes_per_token: float = 4.0,
+        placeholder: Optional[str] = None,
+    ):
+        """Initialize the budget.
+
+        Args:
+            max_bytes (int, optional): Maximum payload size in UTF-8 bytes.
+            max_tokens (int, optional): Maximum estimated payload tokens.
+            bytes_per_token (float): Bytes per token used for estimates.
+            placeholder (str, optional): Content of a system message inserted
+                where messages were dropped. ``{count}`` is replaced with the
+                number of dropped messages.
+
+        Raises:
+            ValueError: If no limit is given or a limit is not positive.
+        """
+        if max_bytes is None and max_tokens is None:
+            raise ValueError("Budget requires max_bytes or max_tokens")
+        if (
+            (max_bytes is not None and max_bytes < 1)
+            or (max_tokens is not None and max_tokens < 1)
+            or bytes_per_token <= 0
+        ):
+            raise ValueError("Budget limits must be positive")
+        self.max_bytes = max_bytes
+        self.max_tokens = max_tokens
+        self.bytes_per_token = bytes_per_token
+        self.placeholder = placeholder
+
+    @property
+    def limit(self) -> int:
+        """The effective limit in payload bytes."""
+        limits = []
+        if self.max_bytes is not None:
+            limits.append(self.max_bytes)
+        if self.max_tokens is not None:
+            limits.append(int(self.max_tokens * self.bytes_per_token))
+        return min(limits)
+
+    def key(self) -> Tuple[Any, ...]:
+        """Return the settings that affect the output, for cache keys."""
+        return (self.limit, self.placeholder)
+
+    def __repr__(self) -> str:
+        return (
+            f"Budget(max_bytes={self.max_bytes!r}, max_tokens={self.max_tokens!r}, "
+            f"bytes_per_token={self.bytes_per_token!r})"
+        )
+
+
+def _role(message: Any) -> Any:
+    return message.get("role") if isinstance(message, dict) else message.role
+
+
+def _item_type(message: Any) -> Any:
+    return message.get("type") if isinstance(message, dict) else None
+
+
+def _units(messages: List[Any]) -> List[List[int]]:
+    # Non-system messages grouped into units that are kept or dropped
+    # together: an assistant message with its tool results, or consecutive
+    # function_call items with their outputs. A result without its call (or
+    # the reverse) is rejected by the API.
+    units: List[List[int]] = []
+    previous = None
+    for index, message in enumerate(messages):
+        role = _role(message)
+        if role == "system":
+            continue
+        kind = _item_type(message) if role is None else None
+        if units and (
+            role == "tool"
+            or kind == "function_call_output"
+            or (kind == "function_call" and previous == "function_call")
+        ):
+            units[-1].append(index)
+        else:
+            units.append([index])
+        previous = kind
+    return units
+
+
+def fit_messages(
+    budget: Budget,
+    messages: List[Any],
+    overhead: int,
+    fragment: Optional[Callable[[int], str]] = None,
+) -> Tuple[RawJSON, int]:
+    """Serialize the messages that fit the budget into a messages array.
+
+    Messages are serialized at most once each, newest first, and
+    serialization stops at the first message that does not fit, so dropped
+    history costs nothing. Serialized fragments are ASCII, so their lengths
+    are their sizes in bytes.
+
+    Args:
+        budget (Budget): The budget to fit.
+        messages (list): Validated messages, oldest first.
+        overhead (int): Size in bytes of the payload without the array.
+        fragment (callable, optional): Returns the serialized JSON of the
+            message at an index. Defaults to serializing it.
+
+    Returns:
+        tuple: The messages array as RawJSON, and the number of messages
+        dropped.
+
+    Raises:
+        ValueError: If the system messages and the latest message (with its
+            tool calls or results) alone exceed the budget.
+    """
+    if fragment is None:
+
+        def fragment(index: int) -> str:
+            return message_json(messages[index])
+
+    available = budget.limit - overhead - len("[]")
+    parts: List[Optional[str]] = [None] * len(messages)
+    used = 0
+    for index, message in enumerate(messages):
+        if _role(message) == "system":
+            parts[index] = part = fragment(index)
+            used += len(part) + _SEPARATOR
+    # Each kept message costs its size plus a separator; the final array has
+    # one separator fewer, which ``available`` accounts for below.
+    available += _SEPARATOR
+    kept: List[List[int]] = []
+    first_dropped = -1
+    for unit in reversed(_units(messages)):
+        unit_parts = [fragment(index) for index in unit]
+        size = sum(len(part) + _SEPARATOR for part in unit_parts)
+        if used + size > available:
+            first_dropped = unit[-1]
+            break
+        for index, part in zip(unit, unit_parts):
+            parts[index] = part
+        used += size
+        kept.append(unit)
+    dropped = 0
+    insert_at = -1
+    if first_dropped >= 0:
+        for index in range(first_dropped + 1):
+            if parts[index] is None:
+                dropped += 1
+        insert_at = first_dropped
+        if budget.placeholder is not None:
+            # Make room for the placeholder by dropping kept units, oldest
+            # first; its size only depends on the count of dropped messages.
+            while True:
+                notice = tojson(
+                    {
+                        "role": "system",
+                        "content": budget.placeholder.replace("{count}", str(dropped)),
+                    }
+                )
+                if used + len(notice) + _SEPARATOR <= available or not kept:
+                    break
+                for index in kept.pop():
+                    used -= len(parts[index]) + _SEPARATOR  # type: ignore[arg-type]
+                    parts[index] = None
+                    dropped += 1
+                    insert_at = index
+            if kept:
+                parts[insert_at] = notice
+                used += len(notice) + _SEPARATOR
+    if max(used, len("[]")) > available or (first_dropped >= 0 and not kept):
+        raise ValueError(
+            f"Messages do not fit the budget of {budget.limit} bytes "
+            "even after dropping older messages"
+        )
+    return RawJSON("[" + ", ".join(p for p in parts if p is not None) + "]"), dropped
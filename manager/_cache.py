@@ -0,0 +1,198 @@
+# SPDX-License-Identifier: MIT
+
+"""Content-addressed LRU cache for rendered payloads."""
+
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from ._types import FunctionTool, Message
+
+_NONE = type(None)
+_STR = {str}
+_chain = chain.from_iterable
+
+
+def _freeze(value: Any) -> Any:
+    # Scalars are tagged with their type, since 1, 1.0 and True are equal
+    # but serialize differently; floats by repr() to tell 0.0 from -0.0.
+    # Dicts keep their insertion order: reordered dicts only miss.
+    cls = value.__class__
+    if cls is str:
+        return value
+    if cls is dict:
+        items = []
+        for key, item in value.items():
+            if key.__class__ is not str:
+                raise TypeError("Non-string key")
+            items.append((key, item if item.__class__ is str else _freeze(item)))
+        return (dict, tuple(items))
+    if cls is list:
+        if value and (value[0].__class__ is dict or value[0].__class__ is Message):
+            # Lists of all-str dicts, the common message history, are
+            # frozen without a Python-level step per message, and tagged
+            # ``Message`` to stay distinct from the general form; Message
+            # lists are frozen as their dict forms.
+            try:
+                if value[0].__class__ is Message:
+                    value = list(map(Message.to_dict, value))
+                pairs = tuple(map(tuple, map(dict.items, value)))
+            except (AttributeError, TypeError):
+                pairs = None
+            if pairs is not None and set(map(type, _chain(_chain(pairs)))) <= _STR:
+                return (Message, pairs)
+        return (list, tuple([_freeze(item) for item in value]))
+    if cls is tuple:
+        # Tuples serialize like lists but fail validation where a list is
+        # required, so they must not hit a payload rendered from a list.
+        return (tuple, tuple([_freeze(item) for item in value]))
+    if cls is Message or cls is FunctionTool:
+        return _freeze(value.to_dict())
+    if cls is float:
+        return (float, repr(value))
+    if cls is int or cls is bool or cls is _NONE:
+        return (cls, value)
+    raise TypeError(f"Object of type {cls.__name__} is not JSON serializable")
+
+
+def cache_key(*parts: Any) -> Optional[Hashable]:
+    """Return a hashable form of render inputs; equal keys render equally.
+
+    The key holds the input strings themselves rather than a digest of
+    their JSON: Python caches each string's hash, so looking up a key whose
+    strings were hashed before costs one pass over the message structure,
+    and equal keys are compared by value, so distinct inputs never collide.
+
+    Returns None when the inputs hold types the key cannot represent, in
+    which case the render bypasses the cache.
+    """
+    try:
+        return tuple(
+            [
+                part if part is None or part.__class__ is str else _freeze(part)
+                for part in parts
+            ]
+        )
+    except (TypeError, RecursionError):
+        return None
+
+
+def _key_size(key: Any) -> int:
+    if key.__class__ is str:
+        return len(key)
+    if key.__class__ is tuple:
+        return sum([_key_size(item) for item in key])
+    return 0
+
+
+class RenderCache:
+    """Bounded LRU cache of rendered payloads with optional expiry.
+
+    Sizes are measured in characters of the payloads and of the strings
+    their keys hold. The cache is thread-safe;
+    pickling it (e.g. into process pool workers) yields an empty cache with
+    the same limits.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ):
+        """Initialize an empty cache.
+
+        Args:
+            max_entries (int): Maximum number of cached payloads.
+            max_bytes (int, optional): Maximum total size of cached payloads
+                and keys.
+            ttl (float, optional): Seconds after which an entry expires.
+
+        Raises:
+            ValueError: If a limit is not positive.
+        """
+        if max_entries < 1 or (max_bytes is not None and max_bytes < 1):
+            raise ValueError("Cache limits must be positive")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("Cache ttl must be positive")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(**state)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """Return the cached payload for a key, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires = entry
+            if self.ttl is not None and time.monotonic() >= expires:
+                self._pop(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: str) -> None:
+        """Store a payload, evicting least recently used entries as needed."""
+        size = len(value) + _key_size(key)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl is not None else 0.0
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = (value, expires)
+            self.size += size
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self.size > self.max_bytes
+            ):
+                self._pop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _pop(self, key: Hashable) -> None:
+        value, _ = self._entries.pop(key)
+        self.size -= len(value) + _key_size(key)
+
+    def clear(self) -> None:
+        """Drop every entry; counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return a snapshot of the cache counters."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,49 @@
+# SPDX-License-Identifier: MIT
+
+"""On-disk cache of templates compiled to Python modules."""
+
+import hashlib
+import os
+import shutil
+import tempfile
+from typing import Any, List
+
+from ._watch import template_index
+
+
+def _fingerprint(template_dirs: List[str]) -> str:
+    # Keyed on the Jinja2 version and each template's name, source directory,
+    # size and mtime, so edits or upgrades land in a fresh directory without
+    # reading sources.
+    import jinja2
+
+    digest = hashlib.sha256(jinja2.__version__.encode("utf-8"))
+    for directory in template_dirs:
+        digest.update(f"\0{os.path.abspath(directory)}".encode())
+    for name, entry in sorted(template_index(template_dirs).items()):
+        digest.update(f"\0{name}\0{entry}".encode())
+    return digest.hexdigest()[:16]
+
+
+def ensure_compiled(env: Any, cache_dir: str, template_dirs: List[str]) -> str:
+    """Compile the templates into ``cache_dir`` unless already present.
+
+    Returns:
+        str: Directory holding the compiled template modules.
+    """
+    target = os.path.join(cache_dir, _fingerprint(template_dirs))
+    if os.path.isdir(target):
+        return target
+    os.makedirs(cache_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=cache_dir, prefix=".compiling-")
+    try:
+        env.compile_templates(staging, zip=None, ignore_errors=False)
+        try:
+            os.replace(staging, target)
+        except OSError:
+            # Another process published the same fingerprint first.
+            if not os.path.isdir(target):
+                raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return target
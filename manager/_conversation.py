@@ -0,0 +1,129 @@
+# SPDX-License-Identifier: MIT
+
+"""Incremental chat completions payload builder."""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+from ._budget import Budget, fit_messages
+from ._metrics import payload_size
+from ._native import RawJSON, message_json, tojson
+
+
+class Conversation:
+    """Growing message history that renders without re-processing old turns.
+
+    Each appended message is validated and serialized once; render() joins
+    the cached fragments into the payload. Output is identical to calling
+    Manager.render_chat_completions() with the full history.
+
+    Appended messages are treated as immutable: mutating a message after
+    appending it is not reflected in later payloads. render() still joins
+    every cached fragment into a new string, so each step of a tool loop
+    costs time linear in the payload size, without re-validating or
+    re-serializing old turns.
+    """
+
+    def __init__(
+        self,
+        manager: Any,
+        model: str,
+        tools: List[Dict[str, Any]] = None,
+        template_name: str = "chat_completions.jinja",
+        **kwargs: Any,
+    ):
+        """Initialize an empty conversation.
+
+        Args:
+            manager (Manager): Manager used for validation and rendering.
+            model (str): The model name (e.g., "grok-4").
+            tools (list, optional): List of tool dicts in OpenAI format, a
+                ToolRegistry, or names of tools in ``manager.tool_registry``.
+            template_name (str): Name of the Jinja2 template to use.
+            **kwargs: Default parameters for every render (temperature, ...).
+
+        Raises:
+            ValueError: If the model or tools do not meet validation requirements.
+        """
+        tools_json = manager._prepare_tools(tools)
+        if type(tools_json) is not RawJSON:
+            tools_json = RawJSON(tojson(tools_json))
+        if not isinstance(model, str):
+            raise ValueError("Model must be a string")
+        self.manager = manager
+        self.model = model
+        self.tools = tools
+        self.template_name = template_name
+        self.kwargs = kwargs
+        self.messages: List[Dict[str, Any]] = []
+        self._fragments: List[str] = []
+        self._tools_json = tools_json
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def append(self, message: Dict[str, Any]) -> None:
+        """Validate, serialize and append a single message.
+
+        Besides plain messages this accepts assistant messages with
+        ``tool_calls`` (e.g. ``StreamDecoder.message()``) and ``tool`` role
+        results.
+
+        Raises:
+            ValueError: If the message does not meet validation requirements.
+        """
+        self.manager._validate_messages([message])
+        self._fragments.append(message_json(message))
+        self.messages.append(message)
+
+    def extend(self, messages: Iterable[Dict[str, Any]]) -> None:
+        """Append several messages in order."""
+        for message in messages:
+            self.append(message)
+
+    def append_tool_result(self, tool_call_id: str, content: Any) -> None:
+        """Append the result of a tool call as a ``tool`` role message.
+
+        Args:
+            tool_call_id (str): The ``id`` of the tool call being answered.
+            content (str or list): The result, as text or content parts.
+        """
+        self.append({"role": "tool", "tool_call_id": tool_call_id, "content": content})
+
+    def render(self, budget: Optional[Budget] = None, **kwargs: Any) -> str:
+        """Render the payload for the current history.
+
+        Args:
+            budget (Budget, optional): Payload size or token budget. Sizes of
+                the cached message fragments are reused, so fitting the budget
+                costs time proportional to the messages kept.
+            **kwargs: Parameters overriding the conversation defaults.
+
+        Returns:
+            str: The rendered JSON payload.
+
+        Raises:
+            ValueError: If the parameters do not meet validation requirements,
+                or the history cannot fit the budget.
+        """
+        params = {**self.kwargs, **kwargs}
+        self.manager._validate_params(params)
+        renderer = self.manager._native_renderer(self.template_name)
+        if renderer is None:
+            return self.manager.render_chat_completions(
+                self.model,
+                self.messages,
+                self.tools,
+                self.template_name,
+                budget=budget,
+                **params,
+            )
+        context = dict(model=self.model, tools=self._tools_json, **params)
+        if budget is None:
+            context["messages"] = RawJSON("[" + ", ".join(self._fragments) + "]")
+        else:
+            context["messages"] = RawJSON("")
+            overhead = payload_size(renderer(context))
+            context["messages"], _ = fit_messages(
+                budget, self.messages, overhead, self._fragments.__getitem__
+            )
+        return renderer(context)
@@ -0,0 +1,140 @@
+# SPDX-License-Identifier: MIT
+
+"""Per-render instrumentation."""
+
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Union
+
+PERCENTILES = (50, 90, 99)
+
+
+class RenderEvent:
+    """Timings and size of one render call.
+
+    Phase timings are in seconds and are None for cache hits.
+    """
+
+    __slots__ = (
+        "method",
+        "template_name",
+        "validation",
+        "lookup",
+        "render",
+        "size",
+        "cache_hit",
+    )
+
+    def __init__(
+        self,
+        method: str,
+        template_name: str,
+        validation: Optional[float],
+        lookup: Optional[float],
+        render: Optional[float],
+        size: int,
+        cache_hit: bool = False,
+    ):
+        self.method = method
+        self.template_name = template_name
+        self.validation = validation
+        self.lookup = lookup
+        self.render = render
+        self.size = size
+        self.cache_hit = cache_hit
+
+
+def payload_size(payload: Union[str, bytes, int]) -> int:
+    """Return the UTF-8 size in bytes of a payload, its encoding or a count."""
+    if isinstance(payload, int):
+        return payload
+    if isinstance(payload, bytes) or payload.isascii():
+        return len(payload)
+    return len(payload.encode("utf-8"))
+
+
+def _summary(samples: Iterable[float], scale: float) -> Dict[str, float]:
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+    summary = {"count": len(ordered), "mean": sum(ordered) / len(ordered) * scale}
+    for p in PERCENTILES:
+        index = min(len(ordered) - 1, (len(ordered) * p) // 100)
+        summary[f"p{p}"] = ordered[index] * scale
+    summary["max"] = ordered[-1] * scale
+    return summary
+
+
+class RenderMetrics:
+    """Collects RenderEvents into rolling windows and forwards them to callbacks.
+
+    Any object with a ``record(event)`` method can be passed to
+    ``Manager(metrics=...)``; this one keeps the last ``window`` samples per
+    phase for percentile snapshots. Pickling it (e.g. into process pool
+    workers) yields empty metrics with the same window and no callbacks.
+    """
+
+    def __init__(
+        self,
+        window: int = 10000,
+        callbacks: Iterable[Callable[[RenderEvent], None]] = (),
+    ):
+        """Initialize empty metrics.
+
+        Args:
+            window (int): Number of recent samples kept per phase.
+            callbacks (iterable): Functions called with every RenderEvent.
+        """
+        self.callbacks: List[Callable[[RenderEvent], None]] = list(callbacks)
+        self._lock = threading.Lock()
+        self._phases: Dict[str, Deque[float]] = {
+            name: deque(maxlen=window)
+            for name in ("validation", "lookup", "render", "size")
+        }
+        self.calls = 0
+        self.cache_hits = 0
+        self.errors = 0
+        self.templates: Dict[str, int] = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"window": self._phases["size"].maxlen}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(**state)
+
+    def record(self, event: RenderEvent) -> None:
+        """Record one completed render."""
+        with self._lock:
+            self.calls += 1
+            self.templates[event.template_name] = (
+                self.templates.get(event.template_name, 0) + 1
+            )
+            self._phases["size"].append(event.size)
+            if event.cache_hit:
+                self.cache_hits += 1
+            else:
+                self._phases["validation"].append(event.validation)
+                self._phases["lookup"].append(event.lookup)
+                self._phases["render"].append(event.render)
+        for callback in self.callbacks:
+            callback(event)
+
+    def record_error(self) -> None:
+        """Count a render that raised."""
+        with self._lock:
+            self.errors += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return counters and percentile summaries (times in milliseconds)."""
+        with self._lock:
+            phases = {name: list(samples) for name, samples in self._phases.items()}
+            snapshot: Dict[str, Any] = {
+                "calls": self.calls,
+                "cache_hits": self.cache_hits,
+                "errors": self.errors,
+                "templates": dict(self.templates),
+            }
+        for name in ("validation", "lookup", "render"):
+            snapshot[f"{name}_ms"] = _summary(phases[name], 1e3)
+        snapshot["size_bytes"] = _summary(phases["size"], 1)
+        return snapshot
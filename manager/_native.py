@@ -0,0 +1,248 @@
+# SPDX-License-Identifier: MIT
+
+"""Template-free renderers for the bundled templates.
+
+Each renderer produces byte-identical output to its Jinja2 counterpart in
+``manager/templates`` by assembling the fixed JSON frame directly and
+serializing every structured value exactly once.
+"""
+
+import json
+from json.encoder import encode_basestring_ascii
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from ._stream import WRITE_SIZE
+from ._types import Message, json_default
+
+# Mirrors Jinja2's default ``json.dumps_kwargs`` policy used by ``tojson``,
+# extended to serialize Message and FunctionTool like their dict forms.
+# NaN and infinities have no JSON form and raise ValueError instead of
+# producing an invalid payload.
+_encoder = json.JSONEncoder(sort_keys=True, default=json_default, allow_nan=False)
+
+
+_MESSAGE_JSON = '{"content": %s, "role": %s}'
+
+
+def _escape_html(encoded: str) -> str:
+    # Jinja2's tojson also escapes the HTML-sensitive characters.
+    if "<" in encoded or ">" in encoded or "&" in encoded or "'" in encoded:
+        encoded = (
+            encoded.replace("<", "\\u003c")
+            .replace(">", "\\u003e")
+            .replace("&", "\\u0026")
+            .replace("'", "\\u0027")
+        )
+    return encoded
+
+
+def _encode_messages(messages: List[Any]) -> str:
+    # Histories of Message objects are serialized directly rather than
+    # through the encoder's ``default`` hook, skipping a dict per message.
+    encode = _encoder.encode
+    parts = []
+    for m in messages:
+        if (
+            m.__class__ is Message
+            and m.content.__class__ is str
+            and m.role.__class__ is str
+        ):
+            parts.append(
+                _MESSAGE_JSON
+                % (encode_basestring_ascii(m.content), encode_basestring_ascii(m.role))
+            )
+        else:
+            parts.append(encode(m))
+    return "[" + ", ".join(parts) + "]"
+
+
+def tojson(value: Any) -> str:
+    """Serialize a value the way Jinja2's ``tojson`` filter does.
+
+    Raises:
+        ValueError: If the value contains NaN or an infinity.
+    """
+    cls = value.__class__
+    if cls is str:
+        encoded = encode_basestring_ascii(value)
+    elif cls is list and value and value[0].__class__ is Message:
+        encoded = _encode_messages(value)
+    else:
+        encoded = _encoder.encode(value)
+    return _escape_html(encoded)
+
+
+def message_json(message: Any) -> str:
+    """Serialize one message exactly like ``tojson(message)``.
+
+    Messages holding just a string role and content, as dicts or Message
+    objects, skip the general encoder, which costs more to set up than to
+    run on values this small.
+    """
+    cls = message.__class__
+    if cls is Message:
+        role, content = message.role, message.content
+    elif cls is dict and len(message) == 2:
+        role, content = message.get("role"), message.get("content")
+    else:
+        return tojson(message)
+    if role.__class__ is not str or content.__class__ is not str:
+        return tojson(message)
+    return _escape_html(
+        _MESSAGE_JSON
+        % (encode_basestring_ascii(content), encode_basestring_ascii(role))
+    )
+
+
+class RawJSON(str):
+    """Already-serialized JSON that renderers splice into the frame verbatim."""
+
+    __slots__ = ()
+
+
+# (key, optional) pairs in template order. Every value is serialized with
+# tojson, so the payload is valid JSON whatever the inputs. Optional fields
+# are emitted only when present in the context, matching ``is defined``
+# checks.
+_Field = Tuple[str, bool]
+
+_CHAT_COMPLETIONS: Tuple[_Field, ...] = (
+    ("model", False),
+    ("messages", False),
+    ("tools", True),
+    ("temperature", True),
+    ("max_tokens", True),
+    ("stream", True),
+    ("tool_choice", True),
+)
+
+_RESPONSES: Tuple[_Field, ...] = (
+    ("input", False),
+    ("tools", True),
+    ("temperature", True),
+    ("max_tokens", True),
+    ("stream", True),
+    ("tool_choice", True),
+)
+
+_ADVANCED: Tuple[_Field, ...] = (
+    ("model", False),
+    ("messages", False),
+    ("tools", False),
+    ("temperature", True),
+    ("max_tokens", True),
+    ("stream", True),
+)
+
+_CHAT_WITH_TOOLS: Tuple[_Field, ...] = (
+    ("model", False),
+    ("messages", False),
+    ("tools", False),
+)
+
+
+def _parts(fields: Tuple[_Field, ...], context: Dict[str, Any]) -> List[str]:
+    parts: List[str] = []
+    for key, optional in fields:
+        if optional and key not in context:
+            continue
+        parts.append(',\n  "' if parts else '{\n  "')
+        parts.append(key)
+        parts.append('": ')
+        value = context[key]
+        parts.append(value if type(value) is RawJSON else tojson(value))
+    parts.append("\n}")
+    return parts
+
+
+def _renderer(fields: Tuple[_Field, ...]) -> Callable[[Dict[str, Any]], str]:
+    def render(context: Dict[str, Any]) -> str:
+        return "".join(_parts(fields, context))
+
+    return render
+
+
+def _array_chunks(
+    values: List[Any], encode: Callable[[List[Any]], str]
+) -> Iterator[str]:
+    # Serialize a list in slices of about WRITE_SIZE characters, so the
+    # whole array never exists as one string. The slice length is estimated
+    # from the first element and adapts to the sizes that follow; ``encode``
+    # serializes a slice like tojson.
+    if not values:
+        yield "[]"
+        return
+    chunk = encode(values[:1])[:-1]
+    yield chunk
+    start, count = 1, len(values)
+    step = min(WRITE_SIZE // len(chunk) + 1, 16)
+    while start < count:
+        chunk = encode(values[start : start + step])[1:-1]
+        yield ", "
+        yield chunk
+        start += step
+        if len(chunk) < WRITE_SIZE // 2:
+            step *= 2
+        elif len(chunk) > WRITE_SIZE and step > 1:
+            step //= 2
+    yield "]"
+
+
+def _chunker(fields: Tuple[_Field, ...]) -> Callable[..., Iterator[str]]:
+    def chunks(
+        context: Dict[str, Any], encode: Callable[[List[Any]], str] = tojson
+    ) -> Iterator[str]:
+        first = True
+        for key, optional in fields:
+            if optional and key not in context:
+                continue
+            yield '{\n  "' if first else ',\n  "'
+            first = False
+            yield key
+            yield '": '
+            value = context[key]
+            if type(value) is list:
+                yield from _array_chunks(value, encode)
+            else:
+                yield value if type(value) is RawJSON else tojson(value)
+        yield "\n}"
+
+    return chunks
+
+
+_TEMPLATES: Dict[str, Tuple[_Field, ...]] = {
+    "chat_completions.jinja": _CHAT_COMPLETIONS,
+    "responses.jinja": _RESPONSES,
+    "advanced.jinja": _ADVANCED,
+    "chatwithtools.jinja": _CHAT_WITH_TOOLS,
+}
+
+RENDERERS: Dict[str, Callable[[Dict[str, Any]], str]] = {
+    name: _renderer(fields) for name, fields in _TEMPLATES.items()
+}
+
+# Same output as RENDERERS, generated in fragments of bounded size.
+CHUNKERS: Dict[str, Callable[..., Iterator[str]]] = {
+    name: _chunker(fields) for name, fields in _TEMPLATES.items()
+}
+
+
+def install_filters(env: Any) -> None:
+    """Let ``tojson`` in Jinja2 templates pass RawJSON values through verbatim
+    and serialize Message and FunctionTool values."""
+    from jinja2 import pass_eval_context
+    from jinja2.filters import do_tojson
+    from markupsafe import Markup
+
+    @pass_eval_context
+    def tojson_filter(eval_ctx: Any, value: Any, indent: Any = None) -> Any:
+        if indent is None:
+            return Markup(value if type(value) is RawJSON else tojson(value))
+        return do_tojson(eval_ctx, value, indent)
+
+    env.filters["tojson"] = tojson_filter
+    env.policies["json.dumps_kwargs"] = {
+        "sort_keys": True,
+        "default": json_default,
+        "allow_nan": False,
+    }
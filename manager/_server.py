@@ -0,0 +1,138 @@
+# SPDX-License-Identifier: MIT
+
+"""Long-running render server behind ``manager-cli serve``.
+
+Requests are request spec lines as read by ``--jsonl-in``, optionally with an
+``endpoint`` key. Every request is answered, in order, with one JSON line:
+``{"payload": "<rendered payload>"}`` or ``{"error": "<message>"}``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import stat
+import sys
+from functools import partial
+from typing import IO, Any
+
+from ._async import AsyncManager
+from .cli import render_line, spec_request
+
+# Longest request line accepted from a socket client.
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+
+
+def _reply(payload: str) -> bytes:
+    return json.dumps({"payload": payload}).encode("utf-8") + b"\n"
+
+
+def _error(exc: Exception) -> bytes:
+    return json.dumps({"error": str(exc)}).encode("utf-8") + b"\n"
+
+
+def serve_stdio(
+    m: Any, source: IO[str], sink: IO[str], args: argparse.Namespace
+) -> None:
+    """Answer request lines from source on sink until source is exhausted."""
+    out = sink.buffer if hasattr(sink, "buffer") else None
+    for line in source:
+        if not line.strip():
+            continue
+        try:
+            response = _reply(render_line(m, line, args))
+        except Exception as exc:
+            response = _error(exc)
+        if out is not None:
+            out.write(response)
+        else:
+            sink.write(response.decode("utf-8"))
+        sink.flush()
+
+
+async def _respond(am: AsyncManager, line: bytes, args: argparse.Namespace) -> bytes:
+    try:
+        method, kwargs = spec_request(json.loads(line), args)
+        return _reply(await getattr(am, method)(**kwargs))
+    except Exception as exc:
+        return _error(exc)
+
+
+async def _handle_client(
+    am: AsyncManager,
+    args: argparse.Namespace,
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+) -> None:
+    try:
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError as exc:
+                # The line exceeded MAX_REQUEST_BYTES; the stream cannot be
+                # resynchronized, so report it and drop the client.
+                writer.write(_error(exc))
+                break
+            if not line:
+                break
+            if line.strip():
+                writer.write(await _respond(am, line, args))
+                await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+def _remove_stale_socket(path: str) -> None:
+    """Unlink a socket file left behind by a server that is no longer running.
+
+    Raises:
+        OSError: If path is not a socket or a server is listening on it.
+    """
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise OSError(f"{path} exists and is not a socket")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.unlink(path)
+        return
+    finally:
+        probe.close()
+    raise OSError(f"A server is already listening on {path}")
+
+
+async def _serve(m: Any, path: str, args: argparse.Namespace) -> None:
+    loop = asyncio.get_running_loop()
+    stop = loop.create_future()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, partial(stop.set_result, None))
+    server = await asyncio.start_unix_server(
+        partial(_handle_client, AsyncManager(m), args),
+        path=path,
+        limit=MAX_REQUEST_BYTES,
+    )
+    async with server:
+        print(f"serving on {path}", file=sys.stderr, flush=True)
+        await stop
+
+
+def serve_socket(m: Any, path: str, args: argparse.Namespace) -> None:
+    """Serve clients on a Unix domain socket until SIGINT or SIGTERM.
+
+    Raises:
+        OSError: If the socket cannot be created at path.
+    """
+    _remove_stale_socket(path)
+    try:
+        asyncio.run(_serve(m, path, args))
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
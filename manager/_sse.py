@@ -0,0 +1,214 @@
+# SPDX-License-Identifier: MIT
+
+"""Incremental decoder for streamed chat completions and responses.
+
+Raw server-sent event bytes go in as they arrive from the network; parsed
+chunk objects come out, and text and tool-call argument deltas are
+accumulated into the complete assistant message.
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+DONE = b"[DONE]"
+
+# Responses API events that end a stream.
+_RESPONSE_END = frozenset(
+    ["response.completed", "response.failed", "response.incomplete"]
+)
+
+
+class _Choice:
+    """Accumulated state of one streamed choice or response."""
+
+    __slots__ = ("content", "finish_reason", "role", "tool_calls")
+
+    def __init__(self) -> None:
+        self.role = "assistant"
+        self.content: List[str] = []
+        # index -> [id, type, name, argument fragments]
+        self.tool_calls: Dict[int, List[Any]] = {}
+        self.finish_reason: Optional[str] = None
+
+    def tool_call(self, index: int) -> List[Any]:
+        call = self.tool_calls.get(index)
+        if call is None:
+            call = self.tool_calls[index] = [None, "function", "", []]
+        return call
+
+
+class StreamDecoder:
+    """Decodes a ``stream=True`` response body incrementally.
+
+    Feed raw bytes in any chunking; each call returns the JSON chunks that
+    were completed. Chat completions chunks (``choices[].delta``) and
+    Responses API events (``response.*``) are both understood.
+
+    Only the current partial line and event are buffered, bounded by
+    ``max_event_bytes``. Content and argument deltas are kept as lists of
+    fragments and joined once when read.
+    """
+
+    def __init__(self, max_event_bytes: int = 1024 * 1024):
+        """Initialize an empty decoder.
+
+        Args:
+            max_event_bytes (int): Largest accepted event. Anything longer
+                raises ValueError instead of growing the buffer.
+        """
+        self.max_event_bytes = max_event_bytes
+        self.done = False
+        self._buffer = bytearray()
+        self._data: List[bytes] = []
+        self._size = 0
+        self._choices: Dict[int, _Choice] = {}
+
+    def feed(self, data: bytes) -> List[Dict[str, Any]]:
+        """Consume raw stream bytes and return the chunks they completed.
+
+        Raises:
+            ValueError: If an event is not valid JSON or exceeds
+                max_event_bytes.
+        """
+        buffer = self._buffer
+        buffer += data
+        chunks: List[Dict[str, Any]] = []
+        start = 0
+        while True:
+            end = buffer.find(b"\n", start)
+            if end < 0:
+                break
+            line = bytes(buffer[start:end])
+            start = end + 1
+            if line.endswith(b"\r"):
+                line = line[:-1]
+            if not line:
+                chunk = self._dispatch()
+                if chunk is not None:
+                    chunks.append(chunk)
+            elif line.startswith(b"data:"):
+                value = line[6:] if line[5:6] == b" " else line[5:]
+                self._size += len(value)
+                if self._size > self.max_event_bytes:
+                    raise ValueError("Stream event exceeds max_event_bytes")
+                self._data.append(value)
+            # Comments (":"), "event:", "id:" and "retry:" lines carry nothing
+            # the decoder needs: chunk types are in the JSON payloads.
+        del buffer[:start]
+        if len(buffer) > self.max_event_bytes:
+            raise ValueError("Stream event exceeds max_event_bytes")
+        return chunks
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Flush a final event that was not followed by a blank line."""
+        return self.feed(b"\n\n") if self._buffer or self._data else []
+
+    def _dispatch(self) -> Optional[Dict[str, Any]]:
+        data = self._data
+        if not data:
+            return None
+        payload = data[0] if len(data) == 1 else b"\n".join(data)
+        self._data = []
+        self._size = 0
+        if payload == DONE:
+            self.done = True
+            return None
+        try:
+            chunk = json.loads(payload)
+        except ValueError as exc:
+            raise ValueError(f"Invalid stream event: {exc}") from None
+        if chunk.__class__ is dict:
+            if "choices" in chunk:
+                self._apply_chat(chunk)
+            elif "type" in chunk:
+                self._apply_response(chunk)
+        return chunk
+
+    def _choice(self, index: int) -> _Choice:
+        choice = self._choices.get(index)
+        if choice is None:
+            choice = self._choices[index] = _Choice()
+        return choice
+
+    def _apply_chat(self, chunk: Dict[str, Any]) -> None:
+        for item in chunk["choices"]:
+            choice = self._choice(item.get("index", 0))
+            delta = item.get("delta") or {}
+            content = delta.get("content")
+            if content:
+                choice.content.append(content)
+            if "role" in delta:
+                choice.role = delta["role"]
+            for call_delta in delta.get("tool_calls") or ():
+                call = choice.tool_call(call_delta.get("index", 0))
+                if call_delta.get("id"):
+                    call[0] = call_delta["id"]
+                if call_delta.get("type"):
+                    call[1] = call_delta["type"]
+                function = call_delta.get("function") or {}
+                if function.get("name"):
+                    call[2] += function["name"]
+                if function.get("arguments"):
+                    call[3].append(function["arguments"])
+            if item.get("finish_reason"):
+                choice.finish_reason = item["finish_reason"]
+
+    def _apply_response(self, event: Dict[str, Any]) -> None:
+        kind = event["type"]
+        choice = self._choice(0)
+        if kind == "response.output_text.delta":
+            choice.content.append(event["delta"])
+        elif kind == "response.function_call_arguments.delta":
+            choice.tool_call(event["output_index"])[3].append(event["delta"])
+        elif kind in ("response.output_item.added", "response.output_item.done"):
+            item = event["item"]
+            if item.get("type") == "function_call":
+                call = choice.tool_call(event["output_index"])
+                call[0] = item.get("call_id") or item.get("id")
+                call[2] = item.get("name", "")
+                if kind == "response.output_item.done" and "arguments" in item:
+                    call[3] = [item["arguments"]]
+        elif kind in _RESPONSE_END:
+            self.done = True
+            choice.finish_reason = event.get("response", {}).get("status")
+
+    @property
+    def text(self) -> str:
+        """Accumulated content of the first choice."""
+        choice = self._choices.get(0)
+        return "".join(choice.content) if choice else ""
+
+    @property
+    def tool_calls(self) -> List[Dict[str, Any]]:
+        """Complete tool calls of the first choice, in index order."""
+        return self.message().get("tool_calls", [])
+
+    @property
+    def finish_reason(self) -> Optional[str]:
+        """finish_reason of the first choice, or the final Responses status."""
+        choice = self._choices.get(0)
+        return choice.finish_reason if choice else None
+
+    def message(self, index: int = 0) -> Dict[str, Any]:
+        """Return the accumulated assistant message for a choice.
+
+        Tool calls are in chat completions format, with the argument
+        fragments joined into the full JSON string.
+        """
+        choice = self._choices.get(index) or _Choice()
+        message: Dict[str, Any] = {
+            "role": choice.role,
+            "content": "".join(choice.content) if choice.content else None,
+        }
+        if choice.tool_calls:
+            message["tool_calls"] = [
+                {
+                    "id": call_id,
+                    "type": call_type,
+                    "function": {"name": name, "arguments": "".join(arguments)},
+                }
+                for _, (call_id, call_type, name, arguments) in sorted(
+                    choice.tool_calls.items()
+                )
+            ]
+        return message
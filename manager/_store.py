@@ -0,0 +1,224 @@
+# SPDX-License-Identifier: MIT
+
+"""Deduplicating store of serialized content shared across payloads."""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from ._native import RawJSON, tojson
+from ._types import Message
+
+MAX_BYTES = 64 * 2**20
+
+
+class ContentStore:
+    """Bounded LRU store of large strings and tool lists with their JSON.
+
+    Batch jobs often send thousands of payloads that share one long system
+    prompt or tool list. With a store on the Manager, a message ``content``
+    string of at least ``min_size`` characters is escaped once and its JSON
+    spliced into every later payload that repeats it. Strings are matched by
+    value; equal strings decoded separately hit the same entry. Tool lists
+    are matched by identity and validated on first use only. Each entry
+    also records the elements of the list, so a list that was appended to
+    or had an element replaced is validated and serialized again; the tool
+    dicts themselves are treated as immutable, like registered tools.
+
+    Sizes are measured in characters of stored JSON and string keys. The
+    store is thread-safe; pickling it (e.g. into process pool workers)
+    yields an empty store with the same limits.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = MAX_BYTES,
+        min_size: int = 1024,
+    ):
+        """Initialize an empty store.
+
+        Args:
+            max_entries (int): Maximum number of stored values.
+            max_bytes (int, optional): Maximum total size of stored JSON and
+                string keys. Default 64 MiB; None disables the limit.
+            min_size (int): Length from which strings, and the JSON of tool
+                lists, are stored. Shorter values are cheaper to serialize
+                than to look up.
+
+        Raises:
+            ValueError: If a limit is not positive or min_size is negative.
+        """
+        if max_entries < 1 or (max_bytes is not None and max_bytes < 1):
+            raise ValueError("Store limits must be positive")
+        if min_size < 0:
+            raise ValueError("min_size must not be negative")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.min_size = min_size
+        # Strings are keyed by value and tool lists by id(); the entry holds
+        # the list so its id cannot be reused while stored, and the list's
+        # fingerprint to detect in-place changes.
+        self._entries: "OrderedDict[Any, Tuple[Any, Any, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "min_size": self.min_size,
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(**state)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get(self, key: Any, owner: Any, fingerprint: Any = None) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] is not owner or entry[1] != fingerprint:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def _set(self, key: Any, owner: Any, fingerprint: Any, encoded: str) -> None:
+        if self.max_bytes is not None and _cost(key, encoded) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = (owner, fingerprint, encoded)
+            self.size += _cost(key, encoded)
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self.size > self.max_bytes
+            ):
+                self._pop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _pop(self, key: Any) -> None:
+        encoded = self._entries.pop(key)[2]
+        self.size -= _cost(key, encoded)
+
+    def string_json(self, value: str) -> str:
+        """Return ``tojson(value)``, from the store when it was seen before.
+
+        Strings shorter than ``min_size`` are serialized without the store.
+        """
+        if len(value) < self.min_size:
+            return tojson(value)
+        encoded = self._get(value, None)
+        if encoded is None:
+            encoded = tojson(value)
+            self._set(value, None, None, encoded)
+        return encoded
+
+    def tools_json(self, tools: List[Any]) -> Optional[RawJSON]:
+        """Return the stored JSON of a tool list, or None if it is not stored.
+
+        A list changed in place since it was stored counts as not stored.
+        """
+        return self._get(id(tools), tools, _fingerprint(tools))  # type: ignore[return-value]
+
+    def add_tools(self, tools: List[Any]) -> RawJSON:
+        """Serialize a validated tool list, storing it if large enough."""
+        encoded = RawJSON(tojson(tools))
+        if len(encoded) >= self.min_size:
+            self._set(id(tools), tools, _fingerprint(tools), encoded)
+        return encoded
+
+    def messages_json(self, messages: List[Any]) -> RawJSON:
+        """Serialize a message list exactly like ``tojson(messages)``.
+
+        Messages with a large string ``content`` are assembled around its
+        stored JSON; runs of other messages are serialized in one call. The
+        pieces are joined once, so the large strings are copied only into
+        the result.
+        """
+        min_size = self.min_size
+        parts: List[str] = ["["]
+        start = 0
+        for index, message in enumerate(messages):
+            cls = message.__class__
+            if cls is dict:
+                content = message.get("content")
+            elif cls is Message:
+                content = message.content
+            else:
+                continue
+            if content.__class__ is not str or len(content) < min_size:
+                continue
+            if start < index:
+                parts.append(tojson(messages[start:index])[1:-1])
+                parts.append(", ")
+            self._message_parts(message, parts)
+            parts.append(", ")
+            start = index + 1
+        if len(parts) == 1:
+            return RawJSON(tojson(messages))
+        if start < len(messages):
+            parts.append(tojson(messages[start:])[1:-1])
+        else:
+            parts.pop()
+        parts.append("]")
+        return RawJSON("".join(parts))
+
+    def _message_parts(self, message: Any, parts: List[str]) -> None:
+        if message.__class__ is Message:
+            message = message.to_dict()
+        # The encoder sorts keys and converts non-str ones; only the common
+        # all-str case is assembled here.
+        if any(key.__class__ is not str for key in message):
+            parts.append(tojson(message))
+            return
+        separator = "{"
+        for key in sorted(message):
+            value = message[key]
+            parts.append(separator)
+            parts.append(tojson(key))
+            parts.append(": ")
+            if key == "content":
+                parts.append(self.string_json(value))
+            else:
+                parts.append(tojson(value))
+            separator = ", "
+        parts.append("}")
+
+    def clear(self) -> None:
+        """Drop every entry; counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return a snapshot of the store counters."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def _cost(key: Any, encoded: str) -> int:
+    # String keys are held alongside their JSON; tool lists are only
+    # referenced.
+    if key.__class__ is str:
+        return len(key) + len(encoded)
+    return len(encoded)
+
+
+def _fingerprint(tools: List[Any]) -> Tuple[Any, ...]:
+    # Holding the elements keeps their ids from being reused; comparing
+    # the tuples checks identity before equality, so unchanged lists match
+    # without walking the tool dicts.
+    return tuple(tools)
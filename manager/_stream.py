@@ -0,0 +1,125 @@
+# SPDX-License-Identifier: MIT
+
+"""Chunked UTF-8 output for rendered payloads, optionally compressed."""
+
+import io
+from typing import IO, Any, Iterable, List, Optional
+
+# Small template fragments are coalesced into writes of about this size.
+WRITE_SIZE = 64 * 1024
+
+COMPRESSIONS = ("gzip", "zstd")
+
+# zlib's default speed/ratio trade-off; the gzip module defaults to 9, which
+# is several times slower on JSON for a few percent smaller output.
+GZIP_LEVEL = 6
+
+
+def compressor(method: str) -> Any:
+    """Return a new streaming compressor with ``compress()`` and ``flush()``.
+
+    Args:
+        method (str): "gzip", or "zstd" when the ``zstandard`` package (or
+            Python 3.14's ``compression.zstd``) is installed.
+
+    Raises:
+        ValueError: If the method is unsupported or unavailable.
+    """
+    if method == "gzip":
+        import zlib
+
+        # wbits 16 + 15 writes a gzip header and trailer; the header's mtime
+        # is 0, so equal payloads compress to equal bytes.
+        return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    if method == "zstd":
+        try:
+            from compression import zstd  # type: ignore[import-not-found]
+
+            return zstd.ZstdCompressor()
+        except ImportError:
+            pass
+        try:
+            import zstandard  # type: ignore[import-not-found]
+        except ImportError:
+            raise ValueError(
+                "zstd compression requires the zstandard package"
+            ) from None
+        return zstandard.ZstdCompressor().compressobj()
+    raise ValueError(
+        f"Unsupported compression: {method}. Expected one of {', '.join(COMPRESSIONS)}."
+    )
+
+
+def write_chunks(
+    stream: IO[Any], chunks: Iterable[str], compress: Optional[Any] = None
+) -> int:
+    """Write rendered chunks to a binary or text stream.
+
+    Args:
+        stream: Binary or text file object. Compressed output requires a
+            binary one.
+        chunks: Rendered str chunks.
+        compress: Compressor from compressor(). Each batch of chunks is
+            compressed as it is written, so the uncompressed payload is never
+            held in full.
+
+    Returns:
+        int: Number of bytes (binary streams) or characters (text streams)
+        written.
+    """
+    text = isinstance(stream, io.TextIOBase)
+    if text and compress is not None:
+        raise ValueError("Compressed output requires a binary stream")
+    write = stream.write
+    pending: List[str] = []
+    pending_size = written = 0
+    for chunk in chunks:
+        if len(chunk) > WRITE_SIZE:
+            # A large chunk (Jinja2 renders each value as one) is written in
+            # slices, so it is never encoded or compressed as a whole.
+            if pending:
+                written += _flush(write, pending, text, compress)
+                pending.clear()
+                pending_size = 0
+            for start in range(0, len(chunk), WRITE_SIZE):
+                written += _flush(
+                    write, (chunk[start : start + WRITE_SIZE],), text, compress
+                )
+            continue
+        pending.append(chunk)
+        pending_size += len(chunk)
+        if pending_size >= WRITE_SIZE:
+            written += _flush(write, pending, text, compress)
+            pending.clear()
+            pending_size = 0
+    if pending:
+        written += _flush(write, pending, text, compress)
+    if compress is not None:
+        data = compress.flush()
+        write(data)
+        written += len(data)
+    return written
+
+
+def _flush(write: Any, pending: Iterable[str], text: bool, compress: Any) -> int:
+    data: Any = "".join(pending)
+    if not text:
+        data = data.encode("utf-8")
+        if compress is not None:
+            data = compress.compress(data)
+            if not data:
+                return 0
+    write(data)
+    return len(data)
+
+
+def encode_chunks(chunks: Iterable[str], compress: Optional[Any] = None) -> bytes:
+    """Encode rendered chunks to UTF-8 without joining them into one str first.
+
+    Chunks are written through write_chunks() into a buffer whose contents
+    are returned without a final copy. With a compressor from compressor(),
+    only the compressed output accumulates.
+    """
+    buffer = io.BytesIO()
+    write_chunks(buffer, chunks, compress)
+    return buffer.getvalue()
@@ -0,0 +1,144 @@
+# SPDX-License-Identifier: MIT
+
+"""Registry of validated, pre-serialized tool definitions."""
+
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from ._native import RawJSON, tojson
+from ._types import FunctionTool
+from ._validation import validate_tools
+
+# Selections kept per registry. Callers passing per-request subsets of tool
+# names would otherwise grow the cache without bound.
+MAX_SELECTIONS = 256
+
+
+class ToolSelection:
+    """Ordered subset of registry tools with its serialized JSON."""
+
+    __slots__ = ("tools", "json", "digest")
+
+    def __init__(self, tools: List[Dict[str, Any]], json: RawJSON, digest: str):
+        self.tools = tools
+        self.json = json
+        self.digest = digest
+
+
+class ToolRegistry:
+    """Holds function tool definitions validated and serialized once.
+
+    Pass a registry as ``tools`` to render every registered tool, or register
+    tools on ``Manager.tool_registry`` and pass a list of tool names. The tools
+    section is then spliced in pre-rendered and not validated again.
+
+    Registered tool dicts are treated as immutable.
+    """
+
+    def __init__(self, tools: Iterable[Dict[str, Any]] = ()):
+        """Initialize the registry, registering any given tools in order.
+
+        Raises:
+            ValueError: If a tool does not meet validation requirements.
+        """
+        self._tools: Dict[str, Dict[str, Any]] = {}
+        self._json: Dict[str, str] = {}
+        self._hashes: Dict[str, str] = {}
+        self._selections: "OrderedDict[Optional[Tuple[str, ...]], ToolSelection]" = (
+            OrderedDict()
+        )
+        for tool in tools:
+            self.register(tool)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._tools
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tools)
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+    @property
+    def names(self) -> List[str]:
+        """Registered tool names in registration order."""
+        return list(self._tools)
+
+    def get(self, name: str) -> Dict[str, Any]:
+        """Return the registered definition for a tool name.
+
+        Raises:
+            ValueError: If no tool is registered under that name.
+        """
+        try:
+            return self._tools[name]
+        except KeyError:
+            raise ValueError(f"Unknown tool: {name}") from None
+
+    def tool_hash(self, name: str) -> str:
+        """Return the content hash of a registered tool."""
+        self.get(name)
+        return self._hashes[name]
+
+    def register(self, tool: Union[Dict[str, Any], FunctionTool]) -> str:
+        """Validate and register a tool, replacing any tool with the same name.
+
+        Returns:
+            str: SHA-256 content hash of the tool definition.
+
+        Raises:
+            ValueError: If the tool does not meet validation requirements.
+        """
+        import hashlib  # deferred: not needed to start manager-cli
+
+        if isinstance(tool, FunctionTool):
+            tool = tool.to_dict()
+        validate_tools([tool])
+        name = tool["function"]["name"]
+        serialized = tojson(tool)
+        digest = hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+        if self._hashes.get(name) != digest:
+            self._tools[name] = tool
+            self._json[name] = serialized
+            self._hashes[name] = digest
+            self._selections.clear()
+        return digest
+
+    def unregister(self, name: str) -> None:
+        """Remove a tool from the registry."""
+        self.get(name)
+        del self._tools[name], self._json[name], self._hashes[name]
+        self._selections.clear()
+
+    def select(self, names: Optional[Iterable[str]] = None) -> ToolSelection:
+        """Return the cached selection for some tool names, or all tools.
+
+        The most recently used MAX_SELECTIONS selections are kept.
+
+        Raises:
+            ValueError: If a name is not registered.
+        """
+        key = None if names is None else tuple(names)
+        selections = self._selections
+        selection = selections.get(key)
+        if selection is not None:
+            try:
+                selections.move_to_end(key)
+            except KeyError:  # evicted or cleared by another thread
+                pass
+        else:
+            import hashlib
+
+            chosen = list(self._tools) if key is None else list(key)
+            tools = [self.get(name) for name in chosen]
+            digest = hashlib.sha256(
+                " ".join(self._hashes[name] for name in chosen).encode("ascii")
+            ).hexdigest()
+            json = RawJSON("[" + ", ".join(self._json[n] for n in chosen) + "]")
+            selection = selections[key] = ToolSelection(tools, json, digest)
+            while len(selections) > MAX_SELECTIONS:
+                try:
+                    selections.popitem(last=False)
+                except KeyError:
+                    break
+        return selection
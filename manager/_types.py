@@ -0,0 +1,81 @@
+# SPDX-License-Identifier: MIT
+
+"""Compact message and tool types accepted wherever dicts are.
+
+A slotted Message takes a fraction of the memory of the equivalent
+``{"role": ..., "content": ...}`` dict, and roles are interned so a long
+history holds a single copy of each role string. Both types serialize to
+exactly the JSON of their dict form.
+"""
+
+import sys
+from typing import Any, Dict, Optional
+
+
+class Message:
+    """A chat message with a role and string content."""
+
+    __slots__ = ("role", "content")
+
+    def __init__(self, role: str, content: str):
+        self.role = sys.intern(role) if type(role) is str else role
+        self.content = content
+
+    @classmethod
+    def from_dict(cls, message: Dict[str, str]) -> "Message":
+        """Build a Message from a ``{"role": ..., "content": ...}`` dict."""
+        return cls(message["role"], message["content"])
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"role": self.role, "content": self.content}
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not Message:
+            return NotImplemented
+        return self.role == other.role and self.content == other.content
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"Message(role={self.role!r}, content={self.content!r})"
+
+
+class FunctionTool:
+    """A function tool definition in OpenAI format."""
+
+    __slots__ = ("name", "description", "parameters")
+
+    def __init__(
+        self,
+        name: str,
+        description: Optional[str] = None,
+        parameters: Optional[Dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.description = description
+        self.parameters = parameters
+
+    def to_dict(self) -> Dict[str, Any]:
+        function: Dict[str, Any] = {"name": self.name}
+        if self.description is not None:
+            function["description"] = self.description
+        if self.parameters is not None:
+            function["parameters"] = self.parameters
+        return {"type": "function", "function": function}
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not FunctionTool:
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"FunctionTool(name={self.name!r})"
+
+
+def json_default(value: Any) -> Dict[str, Any]:
+    """``default`` hook that lets the JSON encoders serialize these types."""
+    if value.__class__ is Message or value.__class__ is FunctionTool:
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,323 @@
+# SPDX-License-Identifier: MIT
+
+"""Input validation for messages, tools and generation parameters.
+
+The checkers are specialized once at import from ``SCHEMA`` (the payload
+schema documented in ARCHITECTURE.md). Each one makes a single fast pass
+over its input and only walks the slow path to explain the first failure,
+reporting the path of the offending element.
+"""
+
+import math
+from typing import Any, Dict, List
+
+from ._types import FunctionTool, Message
+
+SCHEMA: Dict[str, Any] = {
+    "messages": {
+        "type": "array",
+        "items": {
+            "anyOf": [
+                {
+                    "type": "object",
+                    "properties": {
+                        "role": {
+                            "type": "string",
+                            "enum": ["system", "user", "assistant", "tool"],
+                        },
+                        "content": {
+                            "type": ["string", "array", "null"],
+                            "items": {"type": "object", "required": ["type"]},
+                        },
+                        "tool_calls": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "id": {"type": "string"},
+                                    "type": {"type": "string", "enum": ["function"]},
+                                    "function": {
+                                        "type": "object",
+                                        "properties": {
+                                            "name": {"type": "string"},
+                                            "arguments": {"type": "string"},
+                                        },
+                                        "required": ["name", "arguments"],
+                                    },
+                                },
+                                "required": ["id", "type", "function"],
+                            },
+                        },
+                        "tool_call_id": {"type": "string"},
+                    },
+                    "required": ["role", "content"],
+                },
+                # Responses API input items for a tool call and its result.
+                {
+                    "type": "object",
+                    "properties": {
+                        "type": {"type": "string", "enum": ["function_call"]},
+                        "call_id": {"type": "string"},
+                        "name": {"type": "string"},
+                        "arguments": {"type": "string"},
+                    },
+                    "required": ["type", "call_id", "name", "arguments"],
+                },
+                {
+                    "type": "object",
+                    "properties": {
+                        "type": {"type": "string", "enum": ["function_call_output"]},
+                        "call_id": {"type": "string"},
+                        "output": {"type": "string"},
+                    },
+                    "required": ["type", "call_id", "output"],
+                },
+            ]
+        },
+    },
+    "temperature": {"type": "number", "minimum": 0, "maximum": 2},
+    "max_tokens": {"type": "integer", "minimum": 1},
+    "stream": {"type": "boolean"},
+}
+
+_MESSAGE, _FUNCTION_CALL, _FUNCTION_CALL_OUTPUT = SCHEMA["messages"]["items"]["anyOf"]
+_ROLES = frozenset(_MESSAGE["properties"]["role"]["enum"])
+# Roles whose messages are fully checked by a string content, so the fast
+# path can accept them without looking at other keys.
+_PLAIN_ROLES = _ROLES - {"tool"}
+_TOOL_CALL = _MESSAGE["properties"]["tool_calls"]["items"]
+_ITEM_FIELDS = {
+    schema["properties"]["type"]["enum"][0]: schema["required"][1:]
+    for schema in (_FUNCTION_CALL, _FUNCTION_CALL_OUTPUT)
+}
+_TEMPERATURE_MIN = SCHEMA["temperature"]["minimum"]
+_TEMPERATURE_MAX = SCHEMA["temperature"]["maximum"]
+_MAX_TOKENS_MIN = SCHEMA["max_tokens"]["minimum"]
+_MISSING = object()
+
+
+def _fail(message: str, path: str) -> None:
+    raise ValueError(f"{message} (at {path})")
+
+
+def _explain_tool_calls(tool_calls: Any, path: str) -> None:
+    if not isinstance(tool_calls, list):
+        _fail("'tool_calls' must be a list", path)
+    required = _TOOL_CALL["required"]
+    for index, call in enumerate(tool_calls):
+        call_path = f"{path}[{index}]"
+        if not isinstance(call, dict) or any(key not in call for key in required):
+            _fail(
+                "Each tool call must have 'id', 'type' and 'function' keys", call_path
+            )
+        if not isinstance(call["id"], str):
+            _fail("Tool call 'id' must be a string", f"{call_path}.id")
+        if call["type"] != "function":
+            _fail(
+                f"Unsupported tool call type: {call['type']}. "
+                "Only 'function' type is supported.",
+                f"{call_path}.type",
+            )
+        function = call["function"]
+        if not (
+            isinstance(function, dict)
+            and isinstance(function.get("name"), str)
+            and isinstance(function.get("arguments"), str)
+        ):
+            _fail(
+                "Tool call function must have string 'name' and 'arguments'",
+                f"{call_path}.function",
+            )
+
+
+def _explain_content(content: List[Any], path: str) -> None:
+    for index, part in enumerate(content):
+        if not isinstance(part, dict) or not isinstance(part.get("type"), str):
+            _fail(
+                "Each content part must be a dict with a string 'type'",
+                f"{path}[{index}]",
+            )
+
+
+def _explain_item(item: Dict[str, Any], path: str) -> None:
+    fields = _ITEM_FIELDS.get(item["type"])
+    if fields is None:
+        _fail(
+            f"Unsupported item type: {item['type']}. "
+            f"Expected one of {', '.join(sorted(_ITEM_FIELDS))}.",
+            f"{path}.type",
+        )
+    for field in fields:
+        if not isinstance(item.get(field), str):
+            _fail(f"'{item['type']}' items must have a string '{field}'", path)
+
+
+def _explain_message(msg: Any, path: str, items: bool) -> None:
+    if isinstance(msg, Message):
+        msg = msg.to_dict()
+    if not isinstance(msg, dict):
+        _fail("Each message must be a dict", path)
+    if "role" not in msg and "type" in msg:
+        if items:
+            _explain_item(msg, path)
+            return
+        if msg["type"] in _ITEM_FIELDS:
+            _fail(
+                f"'{msg['type']}' items are only supported by the responses endpoint",
+                f"{path}.type",
+            )
+    if "role" not in msg or "content" not in msg:
+        _fail("Each message must have 'role' and 'content' keys", path)
+    role, content = msg["role"], msg["content"]
+    if not isinstance(role, str) or not isinstance(content, (str, list, type(None))):
+        _fail(
+            "'role' and 'content' must be strings, or 'content' a list of parts",
+            path,
+        )
+    if role not in _ROLES:
+        _fail(
+            f"Unsupported role: {role}. Expected one of {', '.join(sorted(_ROLES))}.",
+            f"{path}.role",
+        )
+    if isinstance(content, list):
+        _explain_content(content, f"{path}.content")
+    if "tool_calls" in msg:
+        if role != "assistant":
+            _fail("Only assistant messages may have 'tool_calls'", f"{path}.tool_calls")
+        _explain_tool_calls(msg["tool_calls"], f"{path}.tool_calls")
+    elif content is None:
+        _fail("'content' may only be null with 'tool_calls'", f"{path}.content")
+    if role == "tool" and not isinstance(msg.get("tool_call_id"), str):
+        _fail("Tool messages must have a string 'tool_call_id'", path)
+
+
+def validate_messages(
+    messages: List[Dict[str, Any]], path: str = "messages", items: bool = False
+) -> None:
+    """Check a message list; ``items`` also accepts Responses API items."""
+    if not isinstance(messages, list):
+        _fail("Messages must be a list", path)
+    roles = _PLAIN_ROLES
+    entries = enumerate(messages)
+    while True:
+        try:
+            for index, msg in entries:
+                if msg.__class__ is dict:
+                    if (
+                        msg["content"].__class__ is str
+                        and msg["role"] in roles
+                        and "tool_calls" not in msg
+                    ):
+                        continue
+                elif (
+                    msg.__class__ is Message
+                    and msg.content.__class__ is str
+                    and msg.role in roles
+                ):
+                    continue
+                break
+            else:
+                return
+        except (KeyError, TypeError):
+            pass
+        # Slow path for the message the fast path stopped at. Tool calls,
+        # tool results, structured content and dict or str subclasses are
+        # valid here; anything else is described. The fast path then resumes
+        # with the next message, as ``entries`` is shared.
+        _explain_message(msg, f"{path}[{index}]", items)
+
+
+def _explain_tool(tool: Any, path: str, legacy: bool) -> None:
+    if isinstance(tool, FunctionTool):
+        return
+    if not isinstance(tool, dict):
+        _fail("Each tool must be a dict", path)
+    if "type" not in tool:
+        _fail("Each tool must have 'type' key", path)
+    if tool["type"] == "function":
+        if "function" not in tool:
+            _fail("Function tools must have 'function' key", path)
+        if "name" not in tool["function"]:
+            _fail("Function must have 'name' key", f"{path}.function")
+    elif legacy:
+        # Legacy format support
+        if "name" not in tool:
+            _fail("Each tool must have 'name' key", path)
+    else:
+        _fail(
+            f"Unsupported tool type: {tool['type']}. "
+            "Only 'function' type is supported.",
+            f"{path}.type",
+        )
+
+
+def _validate_tools(tools: List[Dict[str, Any]], path: str, legacy: bool) -> None:
+    if not isinstance(tools, list):
+        _fail("Tools must be a list", path)
+    try:
+        for tool in tools:
+            if tool.__class__ is dict:
+                if tool["type"] == "function":
+                    func = tool["function"]
+                    if func.__class__ is dict and "name" in func:
+                        continue
+                elif legacy and "name" in tool:
+                    continue
+            elif tool.__class__ is FunctionTool:
+                continue
+            break
+        else:
+            return
+    except (KeyError, TypeError):
+        pass
+    for index, tool in enumerate(tools):
+        _explain_tool(tool, f"{path}[{index}]", legacy)
+
+
+def validate_tools(tools: List[Dict[str, Any]], path: str = "tools") -> None:
+    _validate_tools(tools, path, legacy=False)
+
+
+def validate_tools_legacy(tools: List[Dict[str, Any]], path: str = "tools") -> None:
+    """Legacy validation for backward compatibility."""
+    _validate_tools(tools, path, legacy=True)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_params(params: Dict[str, Any]) -> None:
+    """Check the generation parameters the bundled templates emit.
+
+    Float parameters must also be finite, so that any template can emit them
+    as JSON numbers.
+    """
+    if not params:
+        return
+    temperature = params.get("temperature", _MISSING)
+    if temperature is not _MISSING and not (
+        _is_number(temperature)
+        and not math.isnan(temperature)
+        and _TEMPERATURE_MIN <= temperature <= _TEMPERATURE_MAX
+    ):
+        _fail(
+            f"Temperature must be a number between {_TEMPERATURE_MIN} "
+            f"and {_TEMPERATURE_MAX}",
+            "temperature",
+        )
+    max_tokens = params.get("max_tokens", _MISSING)
+    if max_tokens is not _MISSING and not (
+        isinstance(max_tokens, int)
+        and not isinstance(max_tokens, bool)
+        and max_tokens >= _MAX_TOKENS_MIN
+    ):
+        _fail(f"max_tokens must be an integer >= {_MAX_TOKENS_MIN}", "max_tokens")
+    stream = params.get("stream", _MISSING)
+    if stream is not _MISSING and not isinstance(stream, bool):
+        _fail("stream must be a boolean", "stream")
+    # NaN and infinities have no JSON form. Nested values are caught when
+    # they are serialized.
+    for name, value in params.items():
+        if isinstance(value, float) and not math.isfinite(value):
+            _fail(f"{name} must be a finite number", name)
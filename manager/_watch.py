@@ -0,0 +1,80 @@
+# SPDX-License-Identifier: MIT
+
+"""Template directory index and background change watcher."""
+
+import os
+import threading
+import weakref
+from typing import Callable, Dict, List, Tuple
+
+# Template name -> (index of the directory it resolves from, size, mtime_ns).
+TemplateIndex = Dict[str, Tuple[int, int, int]]
+
+
+def template_index(dirs: List[str]) -> TemplateIndex:
+    """Map each template name to the first of ``dirs`` that provides it.
+
+    Names use "/" separators, as Jinja2 loaders do. Missing directories are
+    skipped.
+    """
+    index: TemplateIndex = {}
+    for position, directory in enumerate(dirs):
+        for root, subdirs, files in os.walk(directory):
+            subdirs.sort()
+            for filename in files:
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, directory).replace(os.sep, "/")
+                if name in index:
+                    continue
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                index[name] = (position, stat.st_size, stat.st_mtime_ns)
+    return index
+
+
+class TemplateWatcher:
+    """Polls template directories on a daemon thread and reports changes.
+
+    The callback is held weakly through its owner, so the thread exits once
+    the owning Manager is garbage collected.
+    """
+
+    def __init__(
+        self,
+        dirs: List[str],
+        interval: float,
+        callback: Callable[[TemplateIndex], None],
+    ):
+        self.dirs = list(dirs)
+        self.interval = interval
+        self.index = template_index(self.dirs)
+        self._callback = weakref.WeakMethod(callback)  # type: ignore[arg-type]
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="manager-template-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            if not self.poll():
+                return
+
+    def poll(self) -> bool:
+        """Check for changes now; return False once the owner is gone."""
+        callback = self._callback()
+        if callback is None:
+            return False
+        with self._lock:
+            index = template_index(self.dirs)
+            if index != self.index:
+                self.index = index
+                callback(index)
+        return True
+
+    def stop(self) -> None:
+        """Stop polling."""
+        self._stopped.set()
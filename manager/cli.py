@@ -1,16 +1,34 @@
 # SPDX-License-Identifier: MIT
 
 import argparse
+import json
 import os
-import shutil
-from pathlib import Path
-from typing import Dict, List
+import re
+import sys
+import time
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
 
 from manager import Manager
 
+# Bundled templates render on the native engine so that a one-shot CLI run
+# never imports Jinja2; other templates still go through Jinja2, using
+# compiled template modules cached under $MANAGER_TEMPLATE_CACHE if set.
+TEMPLATE_CACHE_ENV = "MANAGER_TEMPLATE_CACHE"
+
+
+def cli_manager(**options: Any) -> Manager:
+    """Create the Manager used by the command line tools."""
+    return Manager(
+        engine="native",
+        compiled_templates_dir=os.environ.get(TEMPLATE_CACHE_ENV) or None,
+        **options,
+    )
+
 
 def setup_hooks() -> None:
     """Setup git hooks for conventional commits."""
+    import shutil
+    from pathlib import Path
 
     hooks_dir = Path(".git/hooks")
     if not hooks_dir.exists():
@@ -28,18 +46,170 @@ def setup_hooks() -> None:
         print("Hook script not found.")
 
 
-def main() -> None:
-    parser = argparse.ArgumentParser(
-        description="Generate xAI API payloads using Manager"
+# Payload newlines are structural (JSON strings escape them), so a payload
+# collapses to one JSONL line by dropping each newline and its indentation.
+_LINE_BREAK = re.compile(r"\n *")
+
+
+def read_specs(stream: IO[str]) -> Iterator[Tuple[int, str]]:
+    """Yield (line number, line) pairs for the non-blank lines of a JSONL stream."""
+    for lineno, line in enumerate(stream, 1):
+        if line.strip():
+            yield lineno, line
+
+
+def spec_request(spec: Any, args: argparse.Namespace) -> Tuple[str, Dict[str, Any]]:
+    """Map a request spec to a Manager render method name and its arguments.
+
+    Args:
+        spec (dict): Request spec with ``model``, ``messages``, ``tools`` and
+            optional ``template``, ``kwargs`` and ``endpoint`` keys.
+        args (argparse.Namespace): Defaults for missing ``model``,
+            ``template`` and ``endpoint`` keys.
+
+    Raises:
+        ValueError: If the spec is not an object or names an unknown endpoint.
+    """
+    if not isinstance(spec, dict):
+        raise ValueError("Each request spec must be a JSON object")
+    kwargs: Dict[str, Any] = dict(spec.get("kwargs") or {})
+    endpoint = spec.get("endpoint", args.endpoint)
+    if endpoint == "responses":
+        kwargs.update(
+            input_messages=spec.get("messages"),
+            tools=spec.get("tools"),
+            template_name=spec.get("template", "responses.jinja"),
+        )
+        return "render_responses", kwargs
+    if endpoint != "chat_completions":
+        raise ValueError(f"Unsupported endpoint: {endpoint}")
+    kwargs.update(
+        model=spec.get("model", args.model),
+        messages=spec.get("messages"),
+        tools=spec.get("tools"),
+        template_name=spec.get("template", args.template),
     )
+    return "render_chat_completions", kwargs
+
+
+def render_line(m: Manager, line: str, args: argparse.Namespace) -> str:
+    """Render the payload for one JSON request spec."""
+    method, kwargs = spec_request(json.loads(line), args)
+    return getattr(m, method)(**kwargs)
+
+
+def render_specs(
+    render: Callable[[str], str], specs: Iterator[Tuple[int, str]]
+) -> Iterator[Tuple[int, Union[str, Exception]]]:
+    """Render each spec to a single-line payload, or to the exception it raised."""
+    for lineno, line in specs:
+        try:
+            payload = render(line)
+        except Exception as exc:
+            yield lineno, exc
+        else:
+            yield lineno, _LINE_BREAK.sub("", payload)
+
+
+class RenderClient:
+    """Blocking client for a ``manager-cli serve --socket`` render server."""
+
+    def __init__(self, path: str):
+        """Connect to the server listening on a Unix socket.
+
+        Raises:
+            OSError: If no server accepts connections at path.
+        """
+        import socket
+
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._socket.connect(path)
+        except OSError:
+            self._socket.close()
+            raise
+        self._file = self._socket.makefile("rwb")
+
+    def render(self, line: str) -> str:
+        """Send one JSON request spec and return the rendered payload.
+
+        Raises:
+            ValueError: If the server could not render the request.
+            ConnectionError: If the server closed the connection.
+        """
+        self._file.write(line.strip().encode("utf-8") + b"\n")
+        self._file.flush()
+        response = self._file.readline()
+        if not response:
+            raise ConnectionError("Render server closed the connection")
+        reply = json.loads(response)
+        if "error" in reply:
+            raise ValueError(reply["error"])
+        return reply["payload"]
+
+    def close(self) -> None:
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self) -> "RenderClient":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def run_jsonl(render: Callable[[str], str], args: argparse.Namespace) -> int:
+    """Stream request specs from --jsonl-in to rendered payloads on --jsonl-out.
+
+    Args:
+        render (callable): Renders the payload for one request spec line.
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        int: Number of specs that failed to render.
+    """
+    source = sys.stdin if args.jsonl_in == "-" else open(args.jsonl_in)
+    sink = sys.stdout if args.jsonl_out == "-" else open(args.jsonl_out, "w")
+    rendered = errors = 0
+    start = last_report = time.monotonic()
+
+    def report() -> None:
+        elapsed = time.monotonic() - start
+        rate = rendered / elapsed if elapsed else 0.0
+        print(
+            f"rendered {rendered} payloads ({errors} errors) "
+            f"in {elapsed:.1f}s, {rate:.0f}/s",
+            file=sys.stderr,
+        )
+
+    try:
+        specs = read_specs(source)
+        for lineno, result in render_specs(render, specs):
+            if isinstance(result, Exception):
+                errors += 1
+                print(f"line {lineno}: {result}", file=sys.stderr)
+                continue
+            sink.write(result)
+            sink.write("\n")
+            rendered += 1
+            if args.progress and time.monotonic() - last_report >= 1.0:
+                last_report = time.monotonic()
+                report()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+        else:
+            sink.flush()
+    if args.progress:
+        report()
+    return errors
+
+
+def add_target_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the --model, --template and --endpoint options."""
     parser.add_argument("--model", default="grok-4", help="Model name")
-    parser.add_argument(
-        "--message", action="append", help="User message (can be used multiple times)"
-    )
-    parser.add_argument("--system-message", help="System message")
-    parser.add_argument(
-        "--tools", nargs="+", default=["web_search"], help="List of tool names"
-    )
     parser.add_argument(
         "--template", default="chat_completions.jinja", help="Template name"
     )
@@ -49,23 +219,111 @@ def main() -> None:
         default="chat_completions",
         help="API endpoint to target",
     )
+
+
+def serve(argv: List[str]) -> None:
+    """Run ``manager-cli serve``: render requests with one warm Manager."""
+    parser = argparse.ArgumentParser(
+        prog="manager-cli serve",
+        description="Render newline-delimited JSON request specs with a "
+        "long-running Manager. Each request is answered with one line holding "
+        '{"payload": ...} or {"error": ...}.',
+    )
+    parser.add_argument(
+        "--socket",
+        metavar="PATH",
+        help="Listen on a Unix domain socket instead of stdin/stdout",
+    )
+    add_target_arguments(parser)
+    args = parser.parse_args(argv)
+
+    from ._server import serve_socket, serve_stdio
+
+    m = cli_manager(auto_reload=False, precompile=True)
+    if args.socket:
+        serve_socket(m, args.socket, args)
+    else:
+        serve_stdio(m, sys.stdin, sys.stdout, args)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] == ["serve"]:
+        serve(argv[1:])
+        return
+
+    parser = argparse.ArgumentParser(
+        description="Generate xAI API payloads using Manager",
+        epilog="Run 'manager-cli serve --help' for the long-running render server.",
+    )
+    add_target_arguments(parser)
+    parser.add_argument(
+        "--message", action="append", help="User message (can be used multiple times)"
+    )
+    parser.add_argument("--system-message", help="System message")
+    parser.add_argument(
+        "--tools", nargs="+", default=["web_search"], help="List of tool names"
+    )
     parser.add_argument("--temperature", type=float, help="Temperature for generation")
     parser.add_argument("--max-tokens", type=int, help="Max tokens for generation")
     parser.add_argument("--stream", action="store_true", help="Enable streaming")
+    parser.add_argument(
+        "--jsonl-in",
+        nargs="?",
+        const="-",
+        metavar="PATH",
+        help="Read request specs (model, messages, tools, kwargs) one per line "
+        "from PATH or stdin",
+    )
+    parser.add_argument(
+        "--jsonl-out",
+        default="-",
+        metavar="PATH",
+        help="Write one payload per line to PATH (default: stdout)",
+    )
+    parser.add_argument(
+        "--progress",
+        action="store_true",
+        help="Report progress and throughput on stderr in --jsonl-in mode",
+    )
+    parser.add_argument(
+        "--compress",
+        choices=["gzip", "zstd"],
+        help="Write the payload compressed (zstd needs the zstandard package); "
+        "not with --jsonl-in",
+    )
+    parser.add_argument(
+        "--connect",
+        metavar="PATH",
+        help="Render through a 'manager-cli serve --socket PATH' server",
+    )
     parser.add_argument(
         "--setup-hooks",
         action="store_true",
         help="Setup git hooks for conventional commits",
     )
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
+    if args.compress and args.jsonl_in:
+        parser.error("--compress cannot be used with --jsonl-in")
     if args.setup_hooks:
         setup_hooks()
+    elif args.jsonl_in:
+        if args.connect:
+            with RenderClient(args.connect) as client:
+                errors = run_jsonl(client.render, args)
+        else:
+            m = cli_manager(auto_reload=False)
+            errors = run_jsonl(lambda line: render_line(m, line, args), args)
+        if errors:
+            sys.exit(1)
     else:
         if not args.message:
-            parser.error("--message is required unless --setup-hooks is used")
-        m: Manager = Manager()
+            parser.error(
+                "--message is required unless --setup-hooks or --jsonl-in is used"
+            )
         messages: List[Dict[str, str]] = []
         if args.system_message:
             messages.append({"role": "system", "content": args.system_message})
@@ -92,15 +350,64 @@ def main() -> None:
         }
         kwargs = {k: v for k, v in kwargs.items() if v}
 
-        if args.endpoint == "responses":
-            payload: str = m.render_responses(
-                messages, tools, template_name="responses.jinja", **kwargs
-            )
-        else:
-            payload: str = m.render_chat_completions(
-                args.model, messages, tools, template_name=args.template, **kwargs
-            )
-        print(payload)
+        if args.connect:
+            spec = {
+                "endpoint": args.endpoint,
+                "model": args.model,
+                "messages": messages,
+                "tools": tools,
+                "kwargs": kwargs,
+            }
+            if args.endpoint == "chat_completions":
+                spec["template"] = args.template
+            with RenderClient(args.connect) as client:
+                try:
+                    payload = client.render(json.dumps(spec))
+                except ValueError as exc:
+                    parser.exit(1, f"{parser.prog}: error: {exc}\n")
+            if args.compress:
+                from ._stream import compressor, encode_chunks
+
+                try:
+                    data = encode_chunks((payload,), compressor(args.compress))
+                except ValueError as exc:
+                    parser.exit(1, f"{parser.prog}: error: {exc}\n")
+            else:
+                data = payload.encode("utf-8") + b"\n"
+            sys.stdout.buffer.write(data)
+            sys.stdout.flush()
+            return
+
+        m: Manager = cli_manager()
+        # Stream the payload to stdout in UTF-8 chunks rather than building
+        # the whole string first. Compressed output is binary, so it gets no
+        # trailing newline.
+        out = sys.stdout.buffer
+        try:
+            if args.endpoint == "responses":
+                m.render_responses_to(
+                    out,
+                    messages,
+                    tools,
+                    template_name="responses.jinja",
+                    compress=args.compress,
+                    **kwargs,
+                )
+            else:
+                m.render_chat_completions_to(
+                    out,
+                    args.model,
+                    messages,
+                    tools,
+                    template_name=args.template,
+                    compress=args.compress,
+                    **kwargs,
+                )
+        except ValueError as exc:
+            parser.exit(1, f"{parser.prog}: error: {exc}\n")
+        if not args.compress:
+            out.write(b"\n")
+        out.flush()
 
 
 if __name__ == "__main__":
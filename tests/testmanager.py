@@ -1,10 +1,14 @@
 # SPDX-License-Identifier: MIT
 
+import json
+import os
 import pytest
 import warnings
 from manager import Manager
+from manager._stream import WRITE_SIZE
 import subprocess
 import sys
+from functools import partial
 from unittest.mock import patch
 from pathlib import Path
 
@@ -252,3 +256,1907 @@ def test_render_with_kwargs():
         temperature=0.5,
     )
     assert '"temperature": 0.5' in result
+
+
+NATIVE_CASES = [
+    {},
+    {"temperature": 0.5},
+    {"temperature": 1, "max_tokens": 100, "stream": True},
+    {"stream": False, "tool_choice": "auto"},
+    {"tool_choice": {"type": "function", "function": {"name": "t"}}},
+]
+
+NATIVE_MESSAGES = [
+    {"role": "system", "content": "You are <helpful> & 'kind'"},
+    {"role": "user", "content": 'Quote " and unicode é \U0001f600\n'},
+]
+
+NATIVE_TOOLS = [
+    {
+        "type": "function",
+        "function": {"name": "b_tool", "parameters": {"z": 1, "a": [1.5, None]}},
+    }
+]
+
+
+@pytest.mark.parametrize("kwargs", NATIVE_CASES)
+@pytest.mark.parametrize("tools", [NATIVE_TOOLS, None, []])
+def test_native_engine_matches_jinja_chat_completions(kwargs, tools):
+    jinja, native = Manager(), Manager(engine="native")
+    for template_name in ["chat_completions.jinja", "advanced.jinja"]:
+        expected = jinja.render_chat_completions(
+            "grok-4", NATIVE_MESSAGES, tools, template_name=template_name, **kwargs
+        )
+        actual = native.render_chat_completions(
+            "grok-4", NATIVE_MESSAGES, tools, template_name=template_name, **kwargs
+        )
+        assert actual == expected
+
+
+@pytest.mark.parametrize("kwargs", NATIVE_CASES)
+@pytest.mark.parametrize("tools", [NATIVE_TOOLS, None])
+def test_native_engine_matches_jinja_responses(kwargs, tools):
+    jinja, native = Manager(), Manager(engine="native")
+    expected = jinja.render_responses(NATIVE_MESSAGES, tools, **kwargs)
+    assert native.render_responses(NATIVE_MESSAGES, tools, **kwargs) == expected
+
+
+def test_native_engine_matches_jinja_chat_with_tools():
+    jinja, native = Manager(), Manager(engine="native")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        expected = jinja.render_chat_with_tools(
+            "m", NATIVE_MESSAGES, NATIVE_TOOLS, template_name="chatwithtools.jinja"
+        )
+        actual = native.render_chat_with_tools(
+            "m", NATIVE_MESSAGES, NATIVE_TOOLS, template_name="chatwithtools.jinja"
+        )
+    assert actual == expected
+
+
+def test_native_engine_invalid():
+    with pytest.raises(ValueError, match="Unsupported engine"):
+        Manager(engine="fast")
+
+
+def test_warmup_compiles_all_templates(tmp_path):
+    m = Manager(bytecode_cache_dir=str(tmp_path), auto_reload=False)
+    names = m.warmup()
+    assert set(names) >= {
+        "advanced.jinja",
+        "chat_completions.jinja",
+        "chatwithtools.jinja",
+        "responses.jinja",
+    }
+    assert set(m._templates) == set(names)
+    assert len(list(tmp_path.iterdir())) == len(names)
+
+
+def test_precompile_serves_cached_templates(tmp_path):
+    m = Manager(precompile=True, bytecode_cache_dir=str(tmp_path), auto_reload=False)
+    template = m._templates["chat_completions.jinja"]
+    with patch.object(m.env, "get_template") as mock_get:
+        result = m.render_chat_completions(
+            "grok-4", [{"role": "user", "content": "test"}]
+        )
+        mock_get.assert_not_called()
+    assert result == template.render(
+        model="grok-4", messages=[{"role": "user", "content": "test"}], tools=None
+    )
+    # A second process reuses the persisted bytecode
+    assert (
+        Manager(bytecode_cache_dir=str(tmp_path)).render_chat_completions(
+            "grok-4", [{"role": "user", "content": "test"}]
+        )
+        == result
+    )
+
+
+def test_auto_reload_skips_in_memory_cache():
+    with pytest.warns(UserWarning, match="precompile=True has no lasting effect"):
+        m = Manager(precompile=True)
+    assert m._templates == {}
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        Manager(precompile=True, auto_reload=False)
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_render_chat_completions_batch(executor):
+    m = Manager(engine="native")
+    requests = [
+        {"model": "grok-4", "messages": [{"role": "user", "content": str(i)}]}
+        for i in range(20)
+    ]
+    requests[3] = {"model": "grok-4", "messages": "not a list"}
+    results = m.render_chat_completions_batch(requests, workers=2, executor=executor)
+    assert len(results) == 20
+    assert isinstance(results[3], ValueError)
+    assert "Messages must be a list" in str(results[3])
+    for i, result in enumerate(results):
+        if i != 3:
+            assert result == m.render_chat_completions(**requests[i])
+
+
+def test_render_responses_batch():
+    m = Manager()
+    requests = [
+        {"input_messages": [{"role": "user", "content": "a"}], "temperature": 0.2},
+        {"input_messages": [], "template_name": "nonexistent.jinja"},
+    ]
+    results = m.render_responses_batch(requests)
+    assert results[0] == m.render_responses(**requests[0])
+    assert isinstance(results[1], Exception)
+
+
+def test_render_batch_invalid_executor():
+    with pytest.raises(ValueError, match="Unsupported executor"):
+        Manager().render_responses_batch([], executor="fiber")
+
+
+def test_cli_jsonl_stream(tmp_path):
+    specs = [
+        {"messages": [{"role": "user", "content": "a\nb"}], "kwargs": {"stream": True}},
+        "not an object",
+        {
+            "model": "m",
+            "messages": [],
+            "tools": [{"type": "function", "function": {"name": "t"}}],
+        },
+    ]
+    stdin = "\n".join(json.dumps(spec) for spec in specs) + "\n\n"
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "from manager.cli import main; import sys; sys.argv = ['cli', '--jsonl-in', '--progress']; main()",
+        ],
+        input=stdin,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 1
+    lines = result.stdout.splitlines()
+    m = Manager()
+    assert [json.loads(line) for line in lines] == [
+        json.loads(
+            m.render_chat_completions("grok-4", specs[0]["messages"], stream=True)
+        ),
+        json.loads(m.render_chat_completions("m", [], specs[2]["tools"])),
+    ]
+    assert "line 2: Each request spec must be a JSON object" in result.stderr
+    assert "rendered 2 payloads (1 errors)" in result.stderr
+
+
+def test_cli_jsonl_files(tmp_path):
+    source, sink = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    source.write_text(json.dumps({"messages": [{"role": "user", "content": "x"}]}))
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"from manager.cli import main; import sys; sys.argv = ['cli', '--endpoint', 'responses', '--jsonl-in', {str(source)!r}, '--jsonl-out', {str(sink)!r}]; main()",
+        ],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0
+    assert json.loads(sink.read_text()) == {
+        "input": [{"role": "user", "content": "x"}],
+        "tools": None,
+    }
+
+
+def test_conversation_matches_render_chat_completions():
+    m = Manager()
+    conv = m.conversation("grok-4", NATIVE_TOOLS, temperature=0.3)
+    messages = []
+    assert conv.render() == m.render_chat_completions(
+        "grok-4", messages, NATIVE_TOOLS, temperature=0.3
+    )
+    for message in NATIVE_MESSAGES * 3:
+        conv.append(message)
+        messages.append(message)
+        assert conv.render(stream=True) == m.render_chat_completions(
+            "grok-4", messages, NATIVE_TOOLS, temperature=0.3, stream=True
+        )
+    assert len(conv) == 6
+
+
+def test_conversation_validates_only_new_messages():
+    m = Manager()
+    conv = m.conversation("grok-4", template_name="advanced.jinja")
+    conv.extend(NATIVE_MESSAGES)
+    with patch.object(m, "_validate_messages") as mock_validate:
+        conv.append({"role": "user", "content": "next"})
+        mock_validate.assert_called_once_with([{"role": "user", "content": "next"}])
+    with pytest.raises(ValueError, match="'role' and 'content' must be strings"):
+        conv.append({"role": "user", "content": 1})
+    assert len(conv) == 3
+    assert conv.render() == m.render_chat_completions(
+        "grok-4", conv.messages, template_name="advanced.jinja"
+    )
+
+
+def test_conversation_custom_template_falls_back():
+    m = Manager()
+    conv = m.conversation("grok-4", template_name="nonexistent.jinja")
+    with pytest.raises(Exception):
+        conv.render()
+
+
+REGISTRY_TOOLS = [
+    {"type": "function", "function": {"name": f"tool_{i}", "description": "<d>"}}
+    for i in range(5)
+]
+
+
+@pytest.mark.parametrize("engine", ["jinja", "native"])
+def test_tool_registry_handle_and_names(engine):
+    from manager import ToolRegistry
+
+    registry = ToolRegistry(REGISTRY_TOOLS)
+    m = Manager(engine=engine, tool_registry=registry)
+    messages = [{"role": "user", "content": "hi"}]
+    expected = Manager().render_chat_completions("grok-4", messages, REGISTRY_TOOLS)
+    assert m.render_chat_completions("grok-4", messages, registry) == expected
+    subset = [REGISTRY_TOOLS[3], REGISTRY_TOOLS[1]]
+    with patch.object(m, "_validate_tools") as mock_validate:
+        assert m.render_responses(
+            messages, ["tool_3", "tool_1"], tool_choice="auto"
+        ) == Manager().render_responses(messages, subset, tool_choice="auto")
+        mock_validate.assert_not_called()
+    with pytest.raises(ValueError, match="Unknown tool: missing"):
+        m.render_chat_completions("grok-4", messages, ["missing"])
+    with pytest.raises(ValueError, match="Unknown tool: web_search"):
+        Manager(engine=engine).render_chat_completions(
+            "grok-4", messages, ["web_search"]
+        )
+
+
+def test_tool_registry_bounds_cached_selections():
+    from manager import _tools
+
+    registry = _tools.ToolRegistry(REGISTRY_TOOLS)
+    names = registry.names
+    everything = registry.select()
+    for i in range(_tools.MAX_SELECTIONS + 50):
+        registry.select([names[i % len(names)]] * (i // len(names) + 1))
+        registry.select()
+    assert len(registry._selections) == _tools.MAX_SELECTIONS
+    # Recently used selections survive eviction.
+    assert registry.select() is everything
+
+
+def test_tool_registry_hashes_and_invalidation():
+    from manager import ToolRegistry
+
+    registry = ToolRegistry()
+    digest = registry.register(REGISTRY_TOOLS[0])
+    assert registry.register(dict(REGISTRY_TOOLS[0])) == digest
+    first = registry.select()
+    assert registry.select() is first
+    changed = {"type": "function", "function": {"name": "tool_0", "description": "x"}}
+    assert registry.register(changed) != digest
+    assert registry.select().tools == [changed]
+    assert registry.select().digest != first.digest
+    registry.unregister("tool_0")
+    assert len(registry) == 0 and "tool_0" not in registry
+    with pytest.raises(ValueError, match="Unsupported tool type"):
+        registry.register({"type": "web_search", "name": "x"})
+
+
+def test_conversation_with_tool_registry():
+    from manager import ToolRegistry
+
+    m = Manager(tool_registry=ToolRegistry(REGISTRY_TOOLS))
+    conv = m.conversation("grok-4", ["tool_2"])
+    conv.append({"role": "user", "content": "x"})
+    assert conv.render() == m.render_chat_completions(
+        "grok-4", conv.messages, [REGISTRY_TOOLS[2]]
+    )
+
+
+def test_render_cache_hits_skip_validation():
+    from manager import RenderCache
+
+    cache = RenderCache(max_entries=8)
+    m = Manager(render_cache=cache)
+    messages = [{"role": "user", "content": "hi"}]
+    first = m.render_chat_completions("grok-4", messages, NATIVE_TOOLS, temperature=0.1)
+    with patch.object(m, "_validate_messages") as mock_validate, patch.object(
+        m, "_render"
+    ) as mock_render:
+        again = m.render_chat_completions(
+            "grok-4", [dict(messages[0])], NATIVE_TOOLS, temperature=0.1
+        )
+        mock_validate.assert_not_called()
+        mock_render.assert_not_called()
+    assert again == first
+    assert m.render_responses(messages) == Manager().render_responses(messages)
+    assert m.render_chat_completions("grok-4", messages, NATIVE_TOOLS) != first
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        m.render_chat_with_tools("grok-4", messages, [])
+        m.render_chat_with_tools("grok-4", messages, [])
+    assert cache.stats() == {
+        "entries": 4,
+        "bytes": cache.size,
+        "hits": 2,
+        "misses": 4,
+        "evictions": 0,
+        "expirations": 0,
+    }
+
+
+def test_render_cache_keys_distinguish_json():
+    from manager import Message, RenderCache
+    from manager._cache import cache_key
+
+    messages = [{"role": "user", "content": "hi"}]
+    # Equal values that serialize differently get distinct keys.
+    keys = {cache_key(messages, {"n": value}) for value in (1, 1.0, True, 0.0, -0.0)}
+    assert len(keys) == 5
+    assert cache_key([Message("user", "hi")]) == cache_key(messages)
+    assert cache_key([Message("user", "hi"), messages[0]]) is not None
+    assert cache_key(messages, {"seed": object()}) is None
+    m = Manager(render_cache=RenderCache())
+    for value in (1, 1.0, 0.0, -0.0):
+        payload = m.render_chat_completions("grok-4", messages, temperature=value)
+        assert payload.endswith(f'"temperature": {value!r}\n}}')
+
+
+def test_render_cache_does_not_accept_tuples_for_lists():
+    from manager import RenderCache
+
+    m = Manager(render_cache=RenderCache())
+    parts = [{"type": "text", "text": "hi"}]
+    m.render_chat_completions(
+        "grok-4", [{"role": "user", "content": "hi"}], NATIVE_TOOLS
+    )
+    m.render_chat_completions("grok-4", [{"role": "user", "content": parts}])
+    with pytest.raises(ValueError, match=r"Tools must be a list \(at tools\)"):
+        m.render_chat_completions(
+            "grok-4", [{"role": "user", "content": "hi"}], tuple(NATIVE_TOOLS)
+        )
+    with pytest.raises(ValueError, match=r"a list of parts \(at messages\[0\]\)"):
+        m.render_chat_completions("grok-4", [{"role": "user", "content": tuple(parts)}])
+    assert m.render_cache.stats()["hits"] == 0
+
+
+def test_render_cache_does_not_mask_errors():
+    from manager import RenderCache
+
+    m = Manager(render_cache=RenderCache())
+    for _ in range(2):
+        with pytest.raises(ValueError, match="Messages must be a list"):
+            m.render_chat_completions("grok-4", ({"role": "user", "content": "x"},))
+        with pytest.raises(ValueError, match="'role' and 'content' must be strings"):
+            m.render_chat_completions("grok-4", [{"role": "user", "content": 1}])
+    assert len(m.render_cache) == 0
+
+
+def test_render_cache_eviction_and_ttl():
+    from manager import RenderCache
+
+    # Entries count their payload and key characters.
+    cache = RenderCache(max_entries=2, max_bytes=12)
+    cache.set("a", "12345")
+    cache.set("b", "12345")
+    assert cache.get("a") == "12345"
+    cache.set("c", "1")
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+    assert cache.size == 8
+    cache.set("big", "x" * 10)
+    assert cache.get("big") is None
+    with patch("manager._cache.time.monotonic", return_value=0.0):
+        ttl_cache = RenderCache(ttl=5)
+        ttl_cache.set("k", "v")
+    with patch("manager._cache.time.monotonic", return_value=4.0):
+        assert ttl_cache.get("k") == "v"
+    with patch("manager._cache.time.monotonic", return_value=5.0):
+        assert ttl_cache.get("k") is None
+    assert ttl_cache.stats()["expirations"] == 1
+    with pytest.raises(ValueError, match="Cache limits must be positive"):
+        RenderCache(max_entries=0)
+
+
+STORE_PROMPT = "Answer <only> from 'context' & cite it. é\n" * 40
+
+
+@pytest.mark.parametrize("engine", ["jinja", "native"])
+def test_content_store_output_matches(engine):
+    from manager import ContentStore, Message
+
+    tool_result = {"role": "tool", "tool_call_id": "c1", "content": STORE_PROMPT}
+    histories = [
+        [{"role": "system", "content": STORE_PROMPT}],
+        [
+            {"role": "user", "content": "a"},
+            {"role": "system", "content": STORE_PROMPT},
+            {"role": "user", "content": "b"},
+        ],
+        [Message("system", STORE_PROMPT), Message("user", "b")],
+        [{"role": "user", "content": "short"}, tool_result],
+        [{"role": "user", "content": [{"type": "text", "text": STORE_PROMPT}]}],
+    ]
+    plain = Manager(engine=engine)
+    m = Manager(engine=engine, content_store=ContentStore(min_size=100))
+    for messages in histories:
+        for _ in range(2):
+            assert m.render_chat_completions(
+                "grok-4", messages, NATIVE_TOOLS
+            ) == plain.render_chat_completions("grok-4", messages, NATIVE_TOOLS)
+            assert m.render_responses_bytes(
+                messages, stream=True
+            ) == plain.render_responses_bytes(messages, stream=True)
+    variants = [{"model": "grok-4", "temperature": 0.1}]
+    assert m.render_chat_completions_variants(
+        histories[0], variants
+    ) == plain.render_chat_completions_variants(histories[0], variants)
+    assert m.stats()["store"]["hits"] > 0
+
+
+def test_content_store_dedupes_strings_and_tools():
+    from manager import ContentStore
+
+    store = ContentStore(min_size=100)
+    m = Manager(engine="native", content_store=store)
+    tools = [dict(tool, description="d" * 100) for tool in NATIVE_TOOLS]
+    for i in range(3):
+        # Equal prompts decoded separately share one entry.
+        system = json.loads(json.dumps({"role": "system", "content": STORE_PROMPT}))
+        messages = [system, {"role": "user", "content": f"question {i}"}]
+        if i:
+            with patch.object(m, "_validate_tools") as mock_validate:
+                m.render_chat_completions("grok-4", messages, tools)
+                mock_validate.assert_not_called()
+        else:
+            m.render_chat_completions("grok-4", messages, tools)
+    assert store.stats() == {
+        "entries": 2,
+        "bytes": store.size,
+        "hits": 4,
+        "misses": 2,
+        "evictions": 0,
+    }
+    with pytest.raises(ValueError, match="Each tool must have 'type' key"):
+        m.render_chat_completions("grok-4", messages, [{"name": "x" * 200}])
+
+
+def test_content_store_revalidates_mutated_tools():
+    from manager import ContentStore
+
+    store = ContentStore(min_size=100)
+    m = Manager(engine="native", content_store=store)
+    messages = [{"role": "user", "content": "hi"}]
+    tools = [dict(tool, description="d" * 100) for tool in NATIVE_TOOLS]
+    m.render_chat_completions("grok-4", messages, tools)
+    extra = {"type": "function", "function": {"name": "extra", "parameters": {}}}
+    tools.append(extra)
+    result = json.loads(m.render_chat_completions("grok-4", messages, tools))
+    assert result["tools"][-1] == extra
+    assert len(store) == 1
+    tools[-1] = {"type": "bogus"}
+    with pytest.raises(ValueError, match="Unsupported tool type"):
+        m.render_chat_completions("grok-4", messages, tools)
+    assert ContentStore().max_bytes == 64 * 2**20
+
+
+def test_content_store_eviction():
+    import pickle
+
+    from manager import ContentStore
+
+    store = ContentStore(max_entries=2, max_bytes=500, min_size=10)
+    first, second, third = "a" * 100, "b" * 100, "c" * 100
+    store.string_json(first)
+    store.string_json(second)
+    store.string_json(first)
+    store.string_json(third)
+    assert store.stats()["evictions"] == 1
+    store.string_json(first)
+    assert store.stats()["hits"] == 2
+    store.string_json("x" * 300)
+    assert len(store) == 2
+    # Each entry counts its 100-character key and 102-character JSON.
+    assert store.size == 404
+    copy = pickle.loads(pickle.dumps(store))
+    assert (len(copy), copy.max_entries, copy.min_size) == (0, 2, 10)
+    with pytest.raises(ValueError, match="Store limits must be positive"):
+        ContentStore(max_entries=0)
+
+
+def test_validation_reports_path():
+    m = Manager()
+    messages = [{"role": "user", "content": "ok"}, {"role": "user"}]
+    with pytest.raises(ValueError, match=r"'content' keys \(at messages\[1\]\)"):
+        m.render_chat_completions("model", messages)
+    with pytest.raises(ValueError, match=r"Unsupported role: bot.*messages\[0\]\.role"):
+        m.render_responses([{"role": "bot", "content": "x"}])
+    tools = [NATIVE_TOOLS[0], {"type": "function", "function": {}}]
+    with pytest.raises(ValueError, match=r"'name' key \(at tools\[1\]\.function\)"):
+        m.render_chat_completions("model", [], tools)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        with pytest.raises(ValueError, match="Function tools must have 'function' key"):
+            m.render_chat_with_tools("model", [], [{"type": "function", "name": "x"}])
+
+
+@pytest.mark.parametrize(
+    "params, match",
+    [
+        ({"temperature": 2.5}, "Temperature must be a number between 0 and 2"),
+        ({"temperature": float("nan")}, "Temperature"),
+        ({"temperature": True}, "Temperature"),
+        ({"max_tokens": 0}, "max_tokens must be an integer >= 1"),
+        ({"max_tokens": 1.5}, "max_tokens"),
+        ({"stream": "yes"}, "stream must be a boolean"),
+    ],
+)
+def test_validate_params_invalid(params, match):
+    m = Manager()
+    with pytest.raises(ValueError, match=match):
+        m.render_chat_completions("model", [], **params)
+    with pytest.raises(ValueError, match=match):
+        m.validate([], **params)
+
+
+def test_validation_accepts_subclasses():
+    class Message(dict):
+        pass
+
+    class Text(str):
+        pass
+
+    Manager().validate([Message(role="user", content=Text("x"))])
+
+
+def test_trusted_input_skips_validation():
+    m = Manager()
+    messages = [{"role": "user", "content": "hi"}]
+    with patch.object(m, "_validate_messages") as mock_messages, patch.object(
+        m, "_validate_tools"
+    ) as mock_tools:
+        result = m.render_chat_completions(
+            "grok-4", messages, NATIVE_TOOLS, trusted=True, temperature=1
+        )
+        m.render_responses(messages, NATIVE_TOOLS, trusted=True)
+        mock_messages.assert_not_called()
+        mock_tools.assert_not_called()
+    assert result == m.render_chat_completions(
+        "grok-4", messages, NATIVE_TOOLS, temperature=1
+    )
+
+
+def test_async_manager_matches_sync():
+    import asyncio
+
+    from manager import AsyncManager
+
+    m = Manager()
+    am = AsyncManager(m, offload_threshold=2)
+    short = [{"role": "user", "content": "hi"}]
+    long = NATIVE_MESSAGES * 2
+
+    async def run():
+        return await asyncio.gather(
+            am.render_chat_completions("grok-4", short, NATIVE_TOOLS, stream=True),
+            am.render_chat_completions("grok-4", long, NATIVE_TOOLS, stream=True),
+            am.render_responses(long, max_tokens=5),
+        )
+
+    assert asyncio.run(run()) == [
+        m.render_chat_completions("grok-4", short, NATIVE_TOOLS, stream=True),
+        m.render_chat_completions("grok-4", long, NATIVE_TOOLS, stream=True),
+        m.render_responses(long, max_tokens=5),
+    ]
+
+    async def invalid():
+        await am.render_responses([{"role": "user"}] * 3)
+
+    with pytest.raises(ValueError, match="'role' and 'content' keys"):
+        asyncio.run(invalid())
+
+
+def test_async_manager_bounds_concurrency():
+    import asyncio
+    import threading
+    import time
+
+    from manager import AsyncManager
+
+    m = Manager()
+    lock = threading.Lock()
+    active = []
+    peak = []
+
+    def slow_render(*args, **kwargs):
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.02)
+        with lock:
+            active.pop()
+        return "{}"
+
+    am = AsyncManager(m, max_concurrency=2, offload_threshold=0)
+
+    async def run():
+        return await asyncio.gather(*[am.render_responses([]) for _ in range(8)])
+
+    with patch.object(m, "render_responses", side_effect=slow_render):
+        assert asyncio.run(run()) == ["{}"] * 8
+    assert max(peak) == 2
+    with pytest.raises(ValueError, match="max_concurrency must be positive"):
+        AsyncManager(m, max_concurrency=0)
+
+
+def test_render_metrics_time_budget_fitting_as_render():
+    from manager import Budget, RenderMetrics
+
+    events = []
+    m = Manager(engine="native", metrics=RenderMetrics(callbacks=[events.append]))
+    clock = [0.0]
+    fit_budget = m._fit_budget
+
+    def slow_fit(*args):
+        clock[0] += 10.0
+        return fit_budget(*args)
+
+    with patch("manager.perf_counter", lambda: clock[0]), patch.object(
+        m, "_fit_budget", side_effect=slow_fit
+    ):
+        m.render_chat_completions(
+            "grok-4", BUDGET_HISTORY, budget=Budget(max_bytes=1000)
+        )
+    assert (events[0].validation, events[0].lookup, events[0].render) == (
+        0.0,
+        0.0,
+        10.0,
+    )
+
+
+def test_render_metrics_and_stats():
+    from manager import RenderCache, RenderMetrics
+
+    events = []
+    metrics = RenderMetrics(callbacks=[events.append])
+    m = Manager(metrics=metrics, render_cache=RenderCache())
+    messages = [{"role": "user", "content": "hé"}]
+    payload = m.render_chat_completions("grok-4", messages)
+    m.render_chat_completions("grok-4", messages)
+    m.render_responses(messages, trusted=True)
+    with pytest.raises(ValueError):
+        m.render_responses("not a list")
+    assert len(events) == 3
+    first = events[0]
+    assert first.template_name == "chat_completions.jinja"
+    assert first.method == "chat_completions"
+    assert first.size == len(payload.encode("utf-8"))
+    assert first.validation >= 0 and first.lookup >= 0 and first.render >= 0
+    assert events[1].cache_hit and events[1].render is None
+    stats = m.stats()
+    renders = stats["renders"]
+    assert renders["calls"] == 3
+    assert renders["cache_hits"] == 1
+    assert renders["errors"] == 1
+    assert renders["templates"] == {
+        "chat_completions.jinja": 2,
+        "responses.jinja": 1,
+    }
+    assert renders["render_ms"]["count"] == 2
+    assert set(renders["validation_ms"]) == {
+        "count",
+        "mean",
+        "p50",
+        "p90",
+        "p99",
+        "max",
+    }
+    assert renders["size_bytes"]["max"] == first.size
+    assert stats["cache"]["hits"] == 1
+
+
+def test_metrics_survive_process_batch():
+    import pickle
+
+    from manager import RenderMetrics
+
+    metrics = RenderMetrics(window=5, callbacks=[print])
+    m = Manager(metrics=metrics)
+    m.render_responses([])
+    copy = pickle.loads(pickle.dumps(metrics))
+    assert copy.snapshot()["calls"] == 0
+    assert copy._phases["size"].maxlen == 5
+    assert copy.callbacks == []
+    requests = [{"input_messages": []}] * 3
+    assert (
+        m.render_responses_batch(requests, workers=2, executor="process")
+        == [m.render_responses([])] * 3
+    )
+
+
+def test_stats_disabled():
+    assert Manager().stats() == {}
+
+
+@pytest.mark.parametrize("engine", ["jinja", "native"])
+def test_render_to_stream_and_bytes(engine):
+    import io
+
+    m = Manager(engine=engine)
+    expected = m.render_chat_completions(
+        "grok-4", NATIVE_MESSAGES, NATIVE_TOOLS, stream=True
+    )
+    buffer = io.BytesIO()
+    written = m.render_chat_completions_to(
+        buffer, "grok-4", NATIVE_MESSAGES, NATIVE_TOOLS, stream=True
+    )
+    assert buffer.getvalue() == expected.encode("utf-8")
+    assert written == len(buffer.getvalue())
+    assert m.render_chat_completions_bytes(
+        "grok-4", NATIVE_MESSAGES, NATIVE_TOOLS, stream=True
+    ) == expected.encode("utf-8")
+    text = io.StringIO()
+    m.render_responses_to(text, NATIVE_MESSAGES, max_tokens=3)
+    assert text.getvalue() == m.render_responses(NATIVE_MESSAGES, max_tokens=3)
+    assert m.render_responses_bytes(NATIVE_MESSAGES) == m.render_responses(
+        NATIVE_MESSAGES
+    ).encode("utf-8")
+    with pytest.raises(ValueError, match="Messages must be a list"):
+        m.render_responses_to(buffer, "bad")
+
+
+def test_render_to_stream_coalesces_writes():
+    from manager import RenderCache
+
+    class Sink:
+        def __init__(self):
+            self.writes = []
+
+        def write(self, data):
+            self.writes.append(data)
+
+    m = Manager(render_cache=RenderCache())
+    messages = [{"role": "user", "content": "x" * 1000}] * 200
+    m.render_chat_completions("grok-4", messages)
+    sink = Sink()
+    m.render_chat_completions_to(sink, "grok-4", messages)
+    payload = m.render_chat_completions("grok-4", messages).encode("utf-8")
+    assert b"".join(sink.writes) == payload
+    # The cached payload is written in WRITE_SIZE slices.
+    assert [len(data) for data in sink.writes[:-1]] == [WRITE_SIZE] * (
+        len(payload) // WRITE_SIZE
+    )
+    assert m.render_cache.stats()["hits"] == 2
+
+
+def _peak_bytes(func):
+    import tracemalloc
+
+    func()  # warm up lazily created state
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize("engine", ["jinja", "native"])
+def test_render_to_stream_memory(engine):
+    class Sink:
+        def write(self, data):
+            pass
+
+    m = Manager(engine=engine)
+    messages = [{"role": "user", "content": f"Message {i} " * 50} for i in range(5000)]
+    size = len(m.render_chat_completions_bytes("grok-4", messages))
+    streamed = _peak_bytes(
+        lambda: m.render_chat_completions_to(Sink(), "grok-4", messages)
+    )
+    compressed = _peak_bytes(
+        lambda: m.render_chat_completions_bytes("grok-4", messages, compress="gzip")
+    )
+    if engine == "native":
+        # Only slices of about WRITE_SIZE exist at a time.
+        assert streamed < size / 5
+        assert compressed < size / 5
+    else:
+        # Jinja2 renders the messages as one string, but it is not copied.
+        whole = _peak_bytes(lambda: m.render_chat_completions("grok-4", messages))
+        assert streamed < whole * 1.1
+        assert compressed < whole * 1.1
+
+
+@pytest.mark.parametrize("engine", ["jinja", "native"])
+def test_render_compressed(engine):
+    import gzip
+    import io
+
+    m = Manager(engine=engine)
+    messages = NATIVE_MESSAGES + [{"role": "user", "content": "x" * 100000}]
+    expected = m.render_chat_completions_bytes("grok-4", messages, NATIVE_TOOLS)
+    data = m.render_chat_completions_bytes(
+        "grok-4", messages, NATIVE_TOOLS, compress="gzip"
+    )
+    assert gzip.decompress(data) == expected
+    assert len(data) < len(expected) // 10
+    buffer = io.BytesIO()
+    written = m.render_chat_completions_to(
+        buffer, "grok-4", messages, NATIVE_TOOLS, compress="gzip"
+    )
+    assert written == len(buffer.getvalue())
+    assert gzip.decompress(buffer.getvalue()) == expected
+    assert gzip.decompress(
+        m.render_responses_bytes(NATIVE_MESSAGES, compress="gzip")
+    ) == m.render_responses_bytes(NATIVE_MESSAGES)
+    with pytest.raises(ValueError, match="Unsupported compression: br"):
+        m.render_responses_bytes(NATIVE_MESSAGES, compress="br")
+    with pytest.raises(ValueError, match="requires a binary stream"):
+        m.render_responses_to(io.StringIO(), NATIVE_MESSAGES, compress="gzip")
+
+
+def test_render_compressed_zstd():
+    m = Manager()
+    try:
+        import zstandard
+    except ImportError:
+        with pytest.raises(ValueError, match="requires the zstandard package"):
+            m.render_responses_bytes(NATIVE_MESSAGES, compress="zstd")
+        return
+    data = m.render_responses_bytes(NATIVE_MESSAGES, compress="zstd")
+    assert zstandard.ZstdDecompressor().decompressobj().decompress(
+        data
+    ) == m.render_responses_bytes(NATIVE_MESSAGES)
+
+
+def test_cli_compress():
+    import gzip
+
+    args = [sys.executable, "-m", "manager.cli", "--message", "hi"]
+    plain = subprocess.run(args, capture_output=True, check=True).stdout
+    result = subprocess.run(args + ["--compress", "gzip"], capture_output=True)
+    assert result.returncode == 0
+    assert gzip.decompress(result.stdout) + b"\n" == plain
+    result = subprocess.run(
+        args + ["--compress", "gzip", "--jsonl-in", "-"], capture_output=True
+    )
+    assert result.returncode == 2
+    assert b"--compress cannot be used with --jsonl-in" in result.stderr
+
+
+# Modules a one-shot manager-cli run must not pay for.
+HEAVY_MODULES = ["jinja2", "asyncio", "concurrent.futures", "hashlib"]
+STARTUP_BUDGET_MS = 150
+# Wall time of a one-shot manager-cli run beyond interpreter startup.
+CLI_RUN_BUDGET_MS = 250
+
+
+def _loaded_after(code):
+    check = f"import sys\n{code}\nprint(' '.join(sorted(sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, "-c", check], capture_output=True, text=True, check=True
+    )
+    return set(result.stdout.split())
+
+
+def test_import_does_not_load_heavy_modules():
+    loaded = _loaded_after("import manager.cli")
+    assert not loaded & set(HEAVY_MODULES)
+
+
+def test_cli_run_does_not_import_jinja2():
+    loaded = _loaded_after(
+        "sys.argv = ['manager-cli', '--message', 'hi', '--temperature', '0.5']\n"
+        "import contextlib, io, manager.cli\n"
+        "with contextlib.redirect_stdout(io.TextIOWrapper(io.BytesIO())):\n"
+        "    manager.cli.main()"
+    )
+    assert "manager.cli" in loaded
+    assert not loaded & set(HEAVY_MODULES)
+
+
+def test_import_time_budget():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import manager.cli"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            times[fields[2].strip()] = int(fields[1]) / 1e3
+    assert times["manager.cli"] < STARTUP_BUDGET_MS
+
+
+def _best_wall_ms(command, runs=3):
+    import time
+
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def test_cli_run_time_budget():
+    interpreter = _best_wall_ms([sys.executable, "-c", "pass"])
+    cli = _best_wall_ms([sys.executable, "-m", "manager.cli", "--message", "hi"])
+    assert cli - interpreter < CLI_RUN_BUDGET_MS
+
+
+def test_compiled_templates_dir(tmp_path):
+    cache = tmp_path / "templates"
+    m = Manager(compiled_templates_dir=str(cache))
+    expected = Manager().render_chat_completions(
+        "grok-4", NATIVE_MESSAGES, NATIVE_TOOLS, temperature=0.5
+    )
+    assert (
+        m.render_chat_completions(
+            "grok-4", NATIVE_MESSAGES, NATIVE_TOOLS, temperature=0.5
+        )
+        == expected
+    )
+    compiled = list(cache.rglob("*.py"))
+    assert compiled
+    # A second Manager reuses the compiled modules instead of recompiling.
+    mtimes = {path: path.stat().st_mtime_ns for path in compiled}
+    again = Manager(compiled_templates_dir=str(cache))
+    assert (
+        again.render_chat_completions(
+            "grok-4", NATIVE_MESSAGES, NATIVE_TOOLS, temperature=0.5
+        )
+        == expected
+    )
+    assert {path: path.stat().st_mtime_ns for path in compiled} == mtimes
+
+
+def test_cli_serve_stdio():
+    requests = [
+        {"messages": [{"role": "user", "content": "hi"}], "kwargs": {"stream": True}},
+        {"endpoint": "responses", "messages": [], "kwargs": {"temperature": 0.5}},
+        {"messages": "not a list"},
+    ]
+    stdin = "\n".join(json.dumps(r) for r in requests) + "\n\nnot json\n"
+    result = subprocess.run(
+        [sys.executable, "-m", "manager.cli", "serve"],
+        input=stdin,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    replies = [json.loads(line) for line in result.stdout.splitlines()]
+    m = Manager()
+    assert replies[0] == {
+        "payload": m.render_chat_completions(
+            "grok-4", requests[0]["messages"], stream=True
+        )
+    }
+    assert replies[1] == {"payload": m.render_responses([], temperature=0.5)}
+    assert replies[2] == {"error": "Messages must be a list (at messages)"}
+    assert "error" in replies[3]
+    assert len(replies) == 4
+
+
+def test_cli_serve_socket(tmp_path):
+    import signal
+    import threading
+
+    from manager.cli import RenderClient
+
+    path = str(tmp_path / "render.sock")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "manager.cli", "serve", "--socket", path],
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        assert server.stderr.readline().strip() == f"serving on {path}"
+        argv = ["--message", "hi", "--temperature", "0.3"]
+        local = subprocess.run(
+            [sys.executable, "-m", "manager.cli", *argv],
+            capture_output=True,
+            check=True,
+        )
+        remote = subprocess.run(
+            [sys.executable, "-m", "manager.cli", "--connect", path, *argv],
+            capture_output=True,
+            check=True,
+        )
+        assert remote.stdout == local.stdout
+
+        m = Manager()
+        results = {}
+
+        def client(n):
+            with RenderClient(path) as c:
+                results[n] = [
+                    c.render(json.dumps({"model": f"m{n}", "messages": []}))
+                    for _ in range(20)
+                ]
+
+        threads = [threading.Thread(target=client, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for n in range(8):
+            assert results[n] == [m.render_chat_completions(f"m{n}", [])] * 20
+
+        with RenderClient(path) as c:
+            with pytest.raises(ValueError, match="Unsupported endpoint: x"):
+                c.render('{"endpoint": "x"}')
+            assert c.render('{"messages": []}')
+    finally:
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=10) == 0
+    assert not os.path.exists(path)
+
+
+@pytest.mark.parametrize("engine", ["jinja", "native"])
+def test_message_and_function_tool_types(engine):
+    from manager import FunctionTool, Message
+
+    m = Manager(engine=engine)
+    messages = [Message.from_dict(msg) for msg in NATIVE_MESSAGES]
+    tools = [
+        FunctionTool("web_search", "Search the web <fast> & 'safe'"),
+        FunctionTool("calc", parameters={"type": "object", "properties": {}}),
+    ]
+    tool_dicts = [tool.to_dict() for tool in tools]
+    expected = m.render_chat_completions(
+        "grok-4", NATIVE_MESSAGES, tool_dicts, temperature=0.5
+    )
+    assert m.render_chat_completions("grok-4", messages, tools, temperature=0.5) == (
+        expected
+    )
+    # Mixed histories and the responses endpoint serialize the same way.
+    mixed = messages[:2] + NATIVE_MESSAGES[2:]
+    assert m.render_responses(mixed, tools) == m.render_responses(
+        NATIVE_MESSAGES, tool_dicts
+    )
+    conversation = m.conversation("grok-4", tools)
+    conversation.extend(messages)
+    assert conversation.render() == m.render_chat_completions(
+        "grok-4", NATIVE_MESSAGES, tool_dicts
+    )
+    with pytest.raises(ValueError, match=r"Unsupported role: bot.*messages\[1\]\.role"):
+        m.render_chat_completions("grok-4", [messages[0], Message("bot", "hi")])
+    with pytest.raises(ValueError, match="'role' and 'content' must be strings"):
+        m.render_chat_completions("grok-4", [Message("user", 42)])
+
+
+def test_message_interning_and_pickling():
+    import pickle
+
+    from manager import FunctionTool, Message, RenderCache, ToolRegistry
+
+    role = "".join(["us", "er"])
+    assert Message(role, "hi").role is Message("user", "there").role
+    message = Message("assistant", "hi")
+    assert pickle.loads(pickle.dumps(message)) == message
+    assert message != {"role": "assistant", "content": "hi"}
+    assert ToolRegistry([FunctionTool("calc")]).get("calc") == {
+        "type": "function",
+        "function": {"name": "calc"},
+    }
+    m = Manager(render_cache=RenderCache())
+    first = m.render_chat_completions("grok-4", [message])
+    assert m.render_chat_completions("grok-4", [message.to_dict()]) == first
+    assert m.render_cache.stats()["hits"] == 1
+
+
+BUDGET_HISTORY = [{"role": "system", "content": "Be brief."}] + [
+    {"role": "user" if i % 2 else "assistant", "content": f"Turn {i}. " * 10}
+    for i in range(60)
+]
+
+
+@pytest.mark.parametrize("engine", ["jinja", "native"])
+def test_budget_drops_oldest_messages(engine):
+    from manager import Budget
+
+    m = Manager(engine=engine)
+    full = m.render_chat_completions("grok-4", BUDGET_HISTORY, NATIVE_TOOLS)
+    assert (
+        m.render_chat_completions(
+            "grok-4", BUDGET_HISTORY, NATIVE_TOOLS, budget=Budget(max_bytes=len(full))
+        )
+        == full
+    )
+    for limit in (600, 2000, 5000):
+        payload = m.render_chat_completions(
+            "grok-4",
+            BUDGET_HISTORY,
+            NATIVE_TOOLS,
+            budget=Budget(max_bytes=limit),
+            temperature=0.5,
+        )
+        kept = json.loads(payload)["messages"]
+        assert len(payload.encode("utf-8")) <= limit
+        assert kept[0] == BUDGET_HISTORY[0]
+        assert kept[1:] == BUDGET_HISTORY[len(BUDGET_HISTORY) - len(kept) + 1 :]
+        assert payload == m.render_chat_completions(
+            "grok-4", kept, NATIVE_TOOLS, temperature=0.5
+        )
+        # One more message would not have fit.
+        longer = BUDGET_HISTORY[:1] + BUDGET_HISTORY[-len(kept) :]
+        assert (
+            len(
+                m.render_chat_completions(
+                    "grok-4", longer, NATIVE_TOOLS, temperature=0.5
+                )
+            )
+            > limit
+        )
+    by_tokens = m.render_responses(BUDGET_HISTORY, budget=Budget(max_tokens=250))
+    assert by_tokens == m.render_responses(
+        BUDGET_HISTORY, budget=Budget(max_bytes=1000)
+    )
+
+
+def test_budget_placeholder_and_errors():
+    from manager import Budget, RenderCache
+
+    m = Manager(render_cache=RenderCache())
+    budget = Budget(max_bytes=1500, placeholder="[{count} earlier turns omitted]")
+    payload = m.render_chat_completions("grok-4", BUDGET_HISTORY, budget=budget)
+    kept = json.loads(payload)["messages"]
+    assert len(payload) <= 1500
+    dropped = len(BUDGET_HISTORY) - len(kept) + 1
+    assert kept[1] == {
+        "role": "system",
+        "content": f"[{dropped} earlier turns omitted]",
+    }
+    assert kept[2:] == BUDGET_HISTORY[-len(kept) + 2 :]
+    # Different budgets are cached separately.
+    unbounded = m.render_chat_completions("grok-4", BUDGET_HISTORY)
+    assert unbounded != payload
+    assert m.render_chat_completions("grok-4", BUDGET_HISTORY, budget=budget) == payload
+    with pytest.raises(ValueError, match="do not fit the budget of 100 bytes"):
+        m.render_chat_completions(
+            "grok-4", BUDGET_HISTORY, budget=Budget(max_bytes=100)
+        )
+    with pytest.raises(ValueError, match="Budget requires"):
+        Budget()
+    with pytest.raises(ValueError, match="must be positive"):
+        Budget(max_tokens=0)
+
+
+def test_budget_skips_dropped_messages():
+    from manager import Budget
+
+    m = Manager(engine="native")
+    # Serialization stops at the newest message that does not fit, so
+    # unserializable older messages passed as trusted input do not matter.
+    history = (
+        [{"role": "user", "content": object()}] * 1000
+        + [{"role": "user", "content": "x" * 1000}]
+        + BUDGET_HISTORY[-4:]
+    )
+    payload = m.render_chat_completions(
+        "grok-4", history, trusted=True, budget=Budget(max_bytes=800)
+    )
+    assert json.loads(payload)["messages"] == BUDGET_HISTORY[-4:]
+
+
+def test_conversation_budget():
+    from manager import Budget
+
+    m = Manager(engine="native")
+    conversation = m.conversation("grok-4", NATIVE_TOOLS, temperature=0.5)
+    conversation.extend(BUDGET_HISTORY)
+    for budget in (Budget(max_bytes=2000), Budget(max_tokens=300, placeholder="...")):
+        assert conversation.render(budget=budget, stream=True) == (
+            m.render_chat_completions(
+                "grok-4",
+                BUDGET_HISTORY,
+                NATIVE_TOOLS,
+                budget=budget,
+                temperature=0.5,
+                stream=True,
+            )
+        )
+
+
+@pytest.mark.parametrize("engine", ["jinja", "native"])
+def test_render_variants_match_individual_renders(engine):
+    from manager import Message, RenderMetrics
+
+    m = Manager(engine=engine, metrics=RenderMetrics())
+    variants = [
+        {"model": "grok-4", "temperature": 0.2},
+        {"model": "grok-3", "temperature": 1.0, "max_tokens": 64},
+        {"stream": True},
+    ]
+    payloads = m.render_chat_completions_variants(
+        NATIVE_MESSAGES, variants, NATIVE_TOOLS, model="grok-4-mini", max_tokens=8
+    )
+    assert payloads == [
+        m.render_chat_completions(
+            messages=NATIVE_MESSAGES,
+            tools=NATIVE_TOOLS,
+            **{"model": "grok-4-mini", "max_tokens": 8, **variant},
+        )
+        for variant in variants
+    ]
+    history = [Message.from_dict(msg) for msg in NATIVE_MESSAGES]
+    assert m.render_responses_variants(
+        history, [{"temperature": 0.5}, {}], NATIVE_TOOLS
+    ) == [
+        m.render_responses(NATIVE_MESSAGES, NATIVE_TOOLS, temperature=0.5),
+        m.render_responses(NATIVE_MESSAGES, NATIVE_TOOLS),
+    ]
+    assert m.stats()["renders"]["calls"] == 10
+
+
+def test_render_variants_validation():
+    m = Manager()
+    messages = [{"role": "user", "content": "hi"}]
+    with pytest.raises(ValueError, match="not messages, tools"):
+        m.render_chat_completions_variants(
+            messages, [{"model": "a", "tools": [], "messages": []}]
+        )
+    with pytest.raises(ValueError, match="Temperature must be a number"):
+        m.render_chat_completions_variants(
+            messages, [{"temperature": 0.5}, {"temperature": 3}], model="a"
+        )
+    with pytest.raises(ValueError, match="Model must be a string"):
+        m.render_chat_completions_variants(messages, [{}])
+    with pytest.raises(ValueError, match="Unsupported role"):
+        m.render_responses_variants([{"role": "bot", "content": "x"}], [{}])
+    assert m.render_chat_completions_variants(messages, [], model="a") == []
+
+
+CUSTOM_TEMPLATE = '{"custom": "{{ model }}", "messages": {{ messages | tojson }}}'
+
+
+@pytest.mark.parametrize("engine", ["jinja", "native"])
+def test_template_dirs_override_bundled_templates(tmp_path, engine):
+    (tmp_path / "chat_completions.jinja").write_text(CUSTOM_TEMPLATE)
+    (tmp_path / "extra.jinja").write_text('{"extra": "{{ model }}"}')
+    m = Manager(engine=engine, template_dirs=[str(tmp_path)])
+    messages = [{"role": "user", "content": "hi"}]
+    assert json.loads(m.render_chat_completions("grok-4", messages)) == {
+        "custom": "grok-4",
+        "messages": messages,
+    }
+    assert (
+        m.render_chat_completions("grok-4", messages, template_name="extra.jinja")
+        == '{"extra": "grok-4"}'
+    )
+    # Templates not overridden still come from the bundled directory.
+    assert m.render_responses(messages) == Manager().render_responses(messages)
+    assert "extra.jinja" in m.warmup()
+    compiled = Manager(
+        engine=engine,
+        template_dirs=[str(tmp_path)],
+        compiled_templates_dir=str(tmp_path / "compiled"),
+    )
+    assert compiled.render_chat_completions("grok-4", messages) == (
+        m.render_chat_completions("grok-4", messages)
+    )
+
+
+@pytest.mark.parametrize("engine", ["jinja", "native"])
+def test_template_watcher_invalidates_cache(tmp_path, engine):
+    import gc
+    import os
+
+    from manager import RenderCache
+
+    template = tmp_path / "chat_completions.jinja"
+    m = Manager(
+        engine=engine,
+        template_dirs=[str(tmp_path)],
+        reload_interval=3600,
+        render_cache=RenderCache(),
+    )
+    bundled = Manager().render_chat_completions("grok-4", [])
+    assert m.render_chat_completions("grok-4", []) == bundled
+    template.write_text(CUSTOM_TEMPLATE)
+    assert m.render_chat_completions("grok-4", []) == bundled
+    m._watcher.poll()
+    assert json.loads(m.render_chat_completions("grok-4", [])) == {
+        "custom": "grok-4",
+        "messages": [],
+    }
+    # Renders are served from memory without touching the filesystem.
+    with patch("os.stat", side_effect=AssertionError), patch(
+        "os.path.getmtime", side_effect=AssertionError
+    ):
+        for _ in range(3):
+            m.render_chat_completions("grok-4", [], temperature=0.5)
+    template.write_text('{"v2": "{{ model }}"}')
+    os.utime(template, ns=(0, 0))
+    m._watcher.poll()
+    assert m.render_chat_completions("grok-4", []) == '{"v2": "grok-4"}'
+    template.unlink()
+    m._watcher.poll()
+    assert m.render_chat_completions("grok-4", []) == bundled
+    watcher = m._watcher
+    del m
+    gc.collect()
+    assert watcher.poll() is False
+
+
+def test_reload_interval_must_be_positive():
+    with pytest.raises(ValueError, match="reload_interval must be positive"):
+        Manager(reload_interval=0)
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def _decode(stream, size, **options):
+    from manager import StreamDecoder
+
+    decoder = StreamDecoder(**options)
+    chunks = []
+    for start in range(0, len(stream), size):
+        chunks.extend(decoder.feed(stream[start : start + size]))
+    chunks.extend(decoder.close())
+    return decoder, chunks
+
+
+@pytest.mark.parametrize("size", [1, 7, 64, 1 << 20])
+def test_stream_decoder_chat_tool_calls(size):
+    stream = (FIXTURES / "chat_tool_calls.sse").read_bytes()
+    decoder, chunks = _decode(stream, size)
+    assert decoder.done
+    assert len(chunks) == 12
+    assert chunks[-1]["usage"]["total_tokens"] == 93
+    assert decoder.text == "Let me check the weather in both cities."
+    assert decoder.finish_reason == "tool_calls"
+    assert decoder.message() == {
+        "role": "assistant",
+        "content": "Let me check the weather in both cities.",
+        "tool_calls": [
+            {
+                "id": "call_paris",
+                "type": "function",
+                "function": {
+                    "name": "get_weather",
+                    "arguments": '{"location": "Paris", "unit": "c"}',
+                },
+            },
+            {
+                "id": "call_tokyo",
+                "type": "function",
+                "function": {
+                    "name": "get_weather",
+                    "arguments": '{"location": "Tokyo"}',
+                },
+            },
+        ],
+    }
+    for call in decoder.tool_calls:
+        json.loads(call["function"]["arguments"])
+
+
+@pytest.mark.parametrize("size", [1, 13, 1 << 20])
+def test_stream_decoder_responses_tool_calls(size):
+    stream = (FIXTURES / "responses_tool_calls.sse").read_bytes()
+    decoder, chunks = _decode(stream, size)
+    assert decoder.done
+    assert chunks[0]["type"] == "response.created"
+    assert decoder.text == "Checking the forecast."
+    assert decoder.finish_reason == "completed"
+    assert decoder.tool_calls == [
+        {
+            "id": "call_oslo",
+            "type": "function",
+            "function": {"name": "get_weather", "arguments": '{"location": "Oslo"}'},
+        }
+    ]
+
+
+def test_stream_decoder_multiline_data_and_trailing_event():
+    from manager import StreamDecoder
+
+    decoder = StreamDecoder()
+    assert decoder.feed(b'data: {"choices": [{"index": 1,\ndata: "delta"') == []
+    assert decoder.feed(b': {"content": "hi"}}]}\n') == []
+    (chunk,) = decoder.close()
+    assert chunk["choices"][0]["delta"] == {"content": "hi"}
+    assert decoder.message(1)["content"] == "hi"
+    assert decoder.text == ""
+    assert not decoder.done
+
+
+def test_stream_decoder_bounds_buffering():
+    from manager import StreamDecoder
+
+    decoder = StreamDecoder(max_event_bytes=64)
+    with pytest.raises(ValueError, match="exceeds max_event_bytes"):
+        decoder.feed(b"data: " + b"x" * 100)
+    decoder = StreamDecoder(max_event_bytes=64)
+    with pytest.raises(ValueError, match="exceeds max_event_bytes"):
+        for _ in range(10):
+            decoder.feed(b"data: " + b"x" * 10 + b"\n")
+    with pytest.raises(ValueError, match="Invalid stream event"):
+        StreamDecoder().feed(b"data: {nope\n\n")
+
+
+TOOL_LOOP = [
+    {"role": "system", "content": "You are a weather bot."},
+    {"role": "user", "content": "Weather in Paris?"},
+    {
+        "role": "assistant",
+        "content": None,
+        "tool_calls": [
+            {
+                "id": "call_paris",
+                "type": "function",
+                "function": {
+                    "name": "get_weather",
+                    "arguments": '{"location": "Paris"}',
+                },
+            }
+        ],
+    },
+    {"role": "tool", "tool_call_id": "call_paris", "content": "18C & sunny"},
+    {
+        "role": "user",
+        "content": [
+            {"type": "text", "text": "And this?"},
+            {"type": "image_url", "image_url": {"url": "https://example.com/a.png"}},
+        ],
+    },
+]
+
+
+@pytest.mark.parametrize("engine", ["jinja", "native"])
+def test_tool_call_and_result_messages(engine):
+    m = Manager(engine=engine)
+    payload = m.render_chat_completions("grok-4", TOOL_LOOP, NATIVE_TOOLS)
+    assert json.loads(payload)["messages"] == TOOL_LOOP
+    assert payload == Manager().render_chat_completions(
+        "grok-4", TOOL_LOOP, NATIVE_TOOLS
+    )
+    items = [
+        {"role": "user", "content": "Weather in Oslo?"},
+        {
+            "type": "function_call",
+            "call_id": "call_oslo",
+            "name": "get_weather",
+            "arguments": '{"location": "Oslo"}',
+        },
+        {"type": "function_call_output", "call_id": "call_oslo", "output": "4C"},
+    ]
+    assert json.loads(m.render_responses(items, NATIVE_TOOLS))["input"] == items
+
+
+def _paired(messages):
+    # Every tool result follows its call, and every call has its results.
+    calls = set()
+    results = set()
+    for message in messages:
+        for call in message.get("tool_calls", ()):
+            calls.add(call["id"])
+        if message.get("type") == "function_call":
+            calls.add(message["call_id"])
+        if message.get("role") == "tool":
+            results.add(message["tool_call_id"])
+            assert message["tool_call_id"] in calls
+        if message.get("type") == "function_call_output":
+            results.add(message["call_id"])
+            assert message["call_id"] in calls
+    return calls == results
+
+
+def test_budget_keeps_tool_calls_with_their_results():
+    from manager import Budget
+
+    m = Manager(engine="native")
+    history = TOOL_LOOP[:4] + [{"role": "user", "content": "Thanks!"}]
+    items = [
+        {"role": "system", "content": "You are a weather bot."},
+        {"role": "user", "content": "Weather in Oslo and Rome?"},
+    ]
+    for city in ("oslo", "rome"):
+        items.append(
+            {
+                "type": "function_call",
+                "call_id": city,
+                "name": "get_weather",
+                "arguments": "{}",
+            }
+        )
+    for city in ("oslo", "rome"):
+        items.append({"type": "function_call_output", "call_id": city, "output": "4C"})
+    items.append({"role": "user", "content": "Thanks!"})
+    kept = set()
+    for max_bytes in range(150, 1000, 10):
+        budget = Budget(max_bytes=max_bytes)
+        for payload, key in (
+            (partial(m.render_chat_completions, "grok-4", history), "messages"),
+            (partial(m.render_responses, items), "input"),
+        ):
+            try:
+                messages = json.loads(payload(budget=budget))[key]
+            except ValueError:
+                continue
+            assert _paired(messages)
+            kept.add((key, len(messages)))
+    # Every possible cut was reached.
+    assert kept == {
+        ("messages", 2),
+        ("messages", 4),
+        ("messages", 5),
+        ("input", 2),
+        ("input", 6),
+        ("input", 7),
+    }
+
+
+def test_tool_message_validation():
+    m = Manager()
+    call = TOOL_LOOP[2]["tool_calls"][0]
+    cases = [
+        (
+            {"role": "tool", "content": "x"},
+            r"string 'tool_call_id' \(at messages\[1\]\)",
+        ),
+        (
+            {"role": "user", "content": "x", "tool_calls": [call]},
+            r"Only assistant.*messages\[1\]\.tool_calls",
+        ),
+        ({"role": "assistant", "content": None}, r"null.*messages\[1\]\.content"),
+        (
+            {"role": "assistant", "content": None, "tool_calls": [{**call, "id": 1}]},
+            r"messages\[1\]\.tool_calls\[0\]\.id",
+        ),
+        (
+            {
+                "role": "assistant",
+                "content": "",
+                "tool_calls": [{**call, "function": {"name": "f"}}],
+            },
+            r"'name' and 'arguments'.*tool_calls\[0\]\.function",
+        ),
+        ({"role": "user", "content": [{"text": "x"}]}, r"messages\[1\]\.content\[0\]"),
+        ({"role": "user", "content": 1}, "'role' and 'content' must be strings"),
+        ({"type": "reasoning"}, r"Unsupported item type.*messages\[1\]\.type"),
+        ({"type": "function_call", "call_id": "c"}, "string 'name'"),
+    ]
+    for message, error in cases:
+        with pytest.raises(ValueError, match=error):
+            m.validate([TOOL_LOOP[1], message], responses=True)
+
+
+def test_responses_items_rejected_for_chat_completions():
+    m = Manager(engine="native")
+    item = {"type": "function_call_output", "call_id": "c", "output": "4C"}
+    error = r"only supported by the responses endpoint \(at messages\[1\]\.type\)"
+    with pytest.raises(ValueError, match=error):
+        m.render_chat_completions("grok-4", [TOOL_LOOP[1], item])
+    with pytest.raises(ValueError, match=error):
+        m.render_chat_completions_variants([TOOL_LOOP[1], item], [{"model": "a"}])
+    with pytest.raises(ValueError, match=error):
+        m.validate([TOOL_LOOP[1], item])
+    with pytest.raises(ValueError, match="only supported by the responses endpoint"):
+        m.conversation("grok-4").append(item)
+    (result,) = m.render_chat_completions_batch(
+        [{"model": "grok-4", "messages": [TOOL_LOOP[1], item]}]
+    )
+    assert isinstance(result, ValueError)
+    m.validate([TOOL_LOOP[1], item], responses=True)
+    assert json.loads(m.render_responses([TOOL_LOOP[1], item]))["input"][1] == item
+
+
+def test_validation_resumes_fast_path_after_tool_messages():
+    from manager import _validation
+
+    history = TOOL_LOOP * 3 + [{"role": "bot", "content": "x"}]
+    with patch.object(
+        _validation, "_explain_message", wraps=_validation._explain_message
+    ) as explain:
+        with pytest.raises(ValueError, match=r"messages\[15\]\.role"):
+            Manager().validate(history)
+    # Only the assistant tool call, tool result and content parts messages
+    # of each turn leave the fast path, plus the invalid one.
+    assert explain.call_count == 3 * 3 + 1
+
+
+@pytest.mark.parametrize("tools", [None, [], NATIVE_TOOLS])
+def test_conversation_renders_tool_loop(tools):
+    m = Manager(engine="native")
+    conv = m.conversation("grok-4", tools, tool_choice={"type": "auto", "x": []})
+    expected = []
+    for message in TOOL_LOOP * 2:
+        conv.append(message)
+        expected.append(message)
+        assert conv.render() == m.render_chat_completions(
+            "grok-4", expected, tools, tool_choice={"type": "auto", "x": []}
+        )
+    assert conv.render(temperature=1) != conv.render(temperature=1.0)
+    assert conv.render(temperature=1.0) == m.render_chat_completions(
+        "grok-4",
+        expected,
+        tools,
+        tool_choice={"type": "auto", "x": []},
+        temperature=1.0,
+    )
+    # Old turns are not serialized again.
+    from manager._native import message_json
+
+    with patch("manager._conversation.message_json", wraps=message_json) as encode:
+        conv.append_tool_result("call_paris", "19C")
+        payload = conv.render(temperature=1.0)
+    assert encode.call_count == 1
+    assert json.loads(payload)["messages"][-1] == {
+        "role": "tool",
+        "tool_call_id": "call_paris",
+        "content": "19C",
+    }
+    # Parameters mutated in place between renders are picked up.
+    tool_choice = {"type": "function", "function": {"name": "a"}}
+    first = conv.render(tool_choice=tool_choice)
+    tool_choice["function"]["name"] = "b"
+    assert conv.render(tool_choice=tool_choice) != first
+    assert json.loads(conv.render(tool_choice=tool_choice))["tool_choice"] == (
+        tool_choice
+    )
+
+
+def test_conversation_appends_streamed_tool_calls():
+    from manager import StreamDecoder
+
+    decoder = StreamDecoder()
+    decoder.feed((FIXTURES / "chat_tool_calls.sse").read_bytes())
+    conv = Manager(engine="native").conversation("grok-4", NATIVE_TOOLS)
+    conv.extend(TOOL_LOOP[:2])
+    conv.append(decoder.message())
+    for call in decoder.tool_calls:
+        conv.append_tool_result(call["id"], "ok")
+    messages = json.loads(conv.render())["messages"]
+    assert [m["role"] for m in messages] == [
+        "system",
+        "user",
+        "assistant",
+        "tool",
+        "tool",
+    ]
+    assert messages[2]["tool_calls"] == decoder.tool_calls
+
+
+FUZZ_ALPHABET = (
+    "abcXYZ019 \"\\/'<>&{}[]:,\n\r\t\b\f\x00\x01\x1f\x7f"
+    "\u00e9\u00a0\u2028\ufeff\U0001f600\ud800"
+)
+
+
+def _fuzz_text(rng):
+    return "".join(rng.choice(FUZZ_ALPHABET) for _ in range(rng.randrange(12)))
+
+
+def _fuzz_value(rng, depth=0):
+    kind = rng.randrange(7 if depth < 2 else 5)
+    if kind == 0:
+        return _fuzz_text(rng)
+    if kind == 1:
+        return rng.uniform(-1, 1) * 1e308 if rng.random() < 0.5 else rng.random()
+    if kind == 2:
+        return rng.randrange(-(2**70), 2**70)
+    if kind == 3:
+        return rng.choice([True, False, None])
+    if kind == 4:
+        return rng.choice([0.1, 5e-324, -0.0, 1e16, 2**53 + 1])
+    if kind == 5:
+        return [_fuzz_value(rng, depth + 1) for _ in range(rng.randrange(3))]
+    return {
+        _fuzz_text(rng): _fuzz_value(rng, depth + 1) for _ in range(rng.randrange(3))
+    }
+
+
+@pytest.mark.parametrize("engine", ["jinja", "native"])
+@pytest.mark.parametrize(
+    "template_name",
+    [
+        "chat_completions.jinja",
+        "advanced.jinja",
+        "chatwithtools.jinja",
+        "responses.jinja",
+    ],
+)
+def test_fuzz_payloads_are_valid_json(engine, template_name):
+    import random
+    from functools import partial
+
+    rng = random.Random(f"{engine}-{template_name}")
+    m = Manager(engine=engine)
+    reference = Manager(engine="jinja" if engine == "native" else "native")
+    for _ in range(150):
+        model = _fuzz_text(rng)
+        messages = [
+            {
+                "role": rng.choice(["system", "user", "assistant"]),
+                "content": _fuzz_text(rng),
+            }
+            for _ in range(rng.randrange(4))
+        ]
+        tools = [
+            {
+                "type": "function",
+                "function": {"name": _fuzz_text(rng), "parameters": _fuzz_value(rng)},
+            }
+            for _ in range(rng.randrange(3))
+        ]
+        kwargs = {}
+        if template_name != "chatwithtools.jinja":
+            if rng.random() < 0.5:
+                kwargs["temperature"] = rng.choice([0, 2, 1.0, rng.uniform(0, 2)])
+            if rng.random() < 0.5:
+                kwargs["max_tokens"] = rng.randrange(1, 2**40)
+            if rng.random() < 0.5:
+                kwargs["stream"] = rng.random() < 0.5
+            if template_name != "advanced.jinja" and rng.random() < 0.5:
+                kwargs["tool_choice"] = _fuzz_value(rng)
+        if template_name == "responses.jinja":
+            render = partial(m.render_responses, messages, tools)
+            expected = {"input": messages, "tools": tools, **kwargs}
+        else:
+            render = partial(m.render_chat_completions, model, messages, tools)
+            expected = {"model": model, "messages": messages, "tools": tools, **kwargs}
+        payload = render(template_name=template_name, **kwargs)
+        assert json.loads(payload) == expected
+        assert payload.isascii()
+        if template_name == "responses.jinja":
+            other = reference.render_responses(
+                messages, tools, template_name=template_name, **kwargs
+            )
+        else:
+            other = reference.render_chat_completions(
+                model, messages, tools, template_name=template_name, **kwargs
+            )
+        assert payload == other
+
+
+@pytest.mark.parametrize("engine", ["jinja", "native"])
+def test_non_finite_numbers_are_rejected(engine):
+    m = Manager(engine=engine)
+    messages = [{"role": "user", "content": "hi"}]
+    for value in (float("nan"), float("inf"), -float("inf")):
+        with pytest.raises(ValueError, match="Temperature must be a number"):
+            m.render_chat_completions("grok-4", messages, temperature=value)
+        with pytest.raises(ValueError, match="top_p must be a finite number"):
+            m.validate(messages, top_p=value)
+        tool = {"type": "function", "function": {"name": "f", "parameters": value}}
+        with pytest.raises(ValueError, match="Out of range float"):
+            m.render_chat_completions("grok-4", messages, [tool])
+        # Skipping validation still cannot produce an invalid payload.
+        with pytest.raises(ValueError, match="Out of range float"):
+            m.render_chat_completions(
+                "grok-4", messages, temperature=value, trusted=True
+            )
+
+
+def test_model_name_is_escaped():
+    for engine in ("jinja", "native"):
+        payload = Manager(engine=engine).render_chat_completions(
+            'grok"}, "x": "<y>', []
+        )
+        assert json.loads(payload)["model"] == 'grok"}, "x": "<y>'
+        assert '"model": "grok\\"}, \\"x\\": \\"\\u003cy\\u003e"' in payload
+
+
+@pytest.fixture
+def shared_reset():
+    Manager.set_shared(None)
+    yield
+    Manager.set_shared(None)
+
+
+def test_shared_manager(shared_reset):
+    from manager import AsyncManager
+
+    shared = Manager.shared()
+    assert Manager.shared() is shared
+    assert shared.engine == "native"
+    assert AsyncManager().manager is shared
+    custom = Manager()
+    Manager.set_shared(custom)
+    assert Manager.shared() is custom
+    Manager.set_shared(None)
+    assert Manager.shared() not in (shared, custom)
+
+
+def test_shared_manager_concurrency_stress(shared_reset):
+    import threading
+    import time
+
+    # The Jinja2 engine keeping compiled templates in memory, so the threads
+    # race on creating the environment and compiling the templates.
+    Manager.set_shared(Manager(auto_reload=False))
+    messages = [{"role": "user", "content": "hi"}]
+    names = ["chat_completions.jinja", "advanced.jinja"]
+    expected = [
+        Manager().render_chat_completions(
+            "grok-4", messages, NATIVE_TOOLS, name, temperature=0.5
+        )
+        for name in names
+    ]
+    count = 16
+    barrier = threading.Barrier(count)
+    managers, errors = set(), []
+    create_env = Manager._create_env
+
+    def slow_create_env(self):
+        time.sleep(0.01)
+        return create_env(self)
+
+    def work(index):
+        try:
+            barrier.wait()
+            m = Manager.shared()
+            managers.add(id(m))
+            for i in range(200):
+                which = (index + i) % 2
+                payload = m.render_chat_completions(
+                    "grok-4", messages, NATIVE_TOOLS, names[which], temperature=0.5
+                )
+                assert payload == expected[which]
+        except Exception as exc:
+            errors.append(exc)
+
+    with patch.object(
+        Manager, "_create_env", autospec=True, side_effect=slow_create_env
+    ) as mock_create:
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert errors == []
+    assert len(managers) == 1
+    assert mock_create.call_count == 1
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_shared_manager_after_fork(shared_reset):
+    from manager import RenderCache
+
+    shared = Manager(engine="native", render_cache=RenderCache())
+    Manager.set_shared(shared)
+    messages = [{"role": "user", "content": "hi"}]
+    expected = shared.render_chat_completions("grok-4", messages)
+    shared.env  # compiled in the parent, inherited by the child
+    # Locks held by other parent threads at fork time stay held in the child.
+    shared.render_cache._lock.acquire()
+    shared._env_lock.acquire()
+    import manager
+
+    manager._shared_lock.acquire()
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover - runs in the child
+        import signal
+
+        signal.alarm(10)
+        m = Manager.shared()
+        ok = (
+            m is shared
+            and m._env is not None
+            and m.render_chat_completions("grok-4", messages, temperature=1) != expected
+            and m.render_chat_completions("grok-4", messages) == expected
+            and Manager.shared() is m
+        )
+        Manager.set_shared(None)
+        ok = ok and Manager.shared() is not m
+        os.write(write_fd, b"ok" if ok else b"fail")
+        os._exit(0)
+    manager._shared_lock.release()
+    shared._env_lock.release()
+    shared.render_cache._lock.release()
+    os.close(write_fd)
+    _, status = os.waitpid(pid, 0)
+    assert os.read(read_fd, 16) == b"ok"
+    os.close(read_fd)
+    assert status == 0